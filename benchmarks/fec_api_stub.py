@@ -0,0 +1,190 @@
+import json
+import math
+import time
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """
+    Answers `GET /v1/schedules/schedule_a/` the way api.open.fec.gov does:
+    results sorted newest first, `per_page` at a time, with keyset pagination through
+    `last_index` and `last_contribution_receipt_date`.
+    """
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload: dict):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        server.requests_served += 1
+        if server.latency:
+            time.sleep(server.latency)
+
+        url = urlparse(self.path)
+        if url.path.rstrip("/") != "/v1/schedules/schedule_a":
+            self._send_json(404, {"message": "Not found"})
+            return
+
+        if not server.allow_request():
+            server.rate_limited += 1
+            self._send_json(429, {"error": {
+                "code": "OVER_RATE_LIMIT",
+                "message": "You have exceeded your rate limit. Try again later.",
+            }})
+            return
+
+        query = parse_qs(url.query)
+        per_page = int(query.get("per_page", ["100"])[0])
+        results = server.filter_results(query)
+
+        start = 0
+        if "last_index" in query:
+            start = server.position_after(results, query["last_index"][0])
+        page = results[start:start + per_page]
+        last = page[-1] if page else {}
+
+        self._send_json(200, {
+            "api_version": "1.0",
+            "results": page,
+            "pagination": {
+                "count": len(results),
+                "per_page": per_page,
+                "pages": math.ceil(len(results) / per_page),
+                "is_count_exact": True,
+                "last_indexes": {
+                    "last_index": last.get("sub_id"),
+                    "last_contribution_receipt_date": last.get("contribution_receipt_date"),
+                },
+            },
+        })
+
+
+class FECStubServer(ThreadingHTTPServer):
+    """
+    Local stand-in for the FEC API's `schedules/schedule_a` endpoint, for benchmarks and tests.
+
+    Parameters:
+        transactions: list
+            Results to serve, i.e. from `benchmarks.synthetic.make_transactions()`.
+            Must be sorted newest first and each needs a unique `sub_id`.
+
+        latency: float (default=0)
+            Seconds every request waits before it is answered.
+
+        rate_limit: int (optional)
+            Requests allowed per `rate_window` seconds, the rest get a 429 like the real API.
+
+        rate_window: float (default=60)
+            Length, in seconds, of the sliding rate limit window.
+
+    Usage:
+        with FECStubServer(make_transactions(10000), latency=0.05) as server:
+            os.environ["FEC_API_BASE_URL"] = server.base_url
+            DataFetcher("2020", "P").gimmie_data()
+    """
+
+    daemon_threads = True
+
+    def __init__(self, transactions: list, latency: float = 0, rate_limit: int = None, rate_window: float = 60, port: int = 0):
+        super().__init__(("127.0.0.1", port), _StubHandler)
+        self.transactions = transactions
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+
+        self._positions = {item["sub_id"]: i for i, item in enumerate(transactions)}
+        self._request_times = deque()
+        self._lock = threading.Lock()
+        self._thread = None
+
+        self.requests_served = 0
+        self.rate_limited = 0
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def allow_request(self):
+        if self.rate_limit is None:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            while self._request_times and self._request_times[0] <= now - self.rate_window:
+                self._request_times.popleft()
+            if len(self._request_times) >= self.rate_limit:
+                return False
+            self._request_times.append(now)
+            return True
+
+    def filter_results(self, query: dict) -> list:
+        """
+        Applies the contributor_state/zip/city filters the FEC API supports,
+        returning the matching transactions in served order.
+        """
+        filters = {}
+        for name in ["contributor_state", "contributor_city"]:
+            if name in query:
+                filters[name] = query[name][0].upper()
+        contributor_zip = query.get("contributor_zip", [None])[0]
+        if not filters and not contributor_zip:
+            return self.transactions
+
+        results = []
+        for item in self.transactions:
+            if any((item.get(name) or "").upper() != value for name, value in filters.items()):
+                continue
+            if contributor_zip and not (item.get("contributor_zip") or "").startswith(contributor_zip):
+                continue
+            results.append(item)
+        return results
+
+    def position_after(self, results: list, last_index: str) -> int:
+        if results is self.transactions:
+            return self._positions.get(last_index, len(results) - 1) + 1
+        for i, item in enumerate(results):
+            if item["sub_id"] == last_index:
+                return i + 1
+        return len(results)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+    from benchmarks.synthetic import make_transactions
+
+    parser = argparse.ArgumentParser(description="Serve synthetic schedule_a data on localhost")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--latency", type=float, default=0)
+    parser.add_argument("--rate-limit", type=int, default=None)
+    args = parser.parse_args()
+
+    server = FECStubServer(make_transactions(args.rows), args.latency, args.rate_limit, port=args.port)
+    print(f"Serving {args.rows} transactions, set FEC_API_BASE_URL={server.base_url}")
+    server.serve_forever()
@@ -0,0 +1,273 @@
+"""
+Throughput and peak-memory benchmarks for DataFetcher and DataCleaner.
+
+Run from the repository root:
+    python -m benchmarks.run_benchmarks --sizes 10000,100000 --output bench.json
+    python -m benchmarks.run_benchmarks --compare baseline.json bench.json
+"""
+import os
+import gc
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+import tracemalloc
+from contextlib import ExitStack
+
+from benchmarks.synthetic import make_transactions, make_contributor_df
+from benchmarks.fec_api_stub import FECStubServer
+
+
+BENCHMARKS = {}
+
+
+def benchmark(name: str, units: str):
+    """
+    Registers a benchmark. The decorated function gets (size, options, exit_stack) and
+    returns (run, count): `run` is the callable being timed and `count` is how many
+    `units` one call of `run` processes.
+    """
+    def register(prepare):
+        BENCHMARKS[name] = (prepare, units)
+        return prepare
+    return register
+
+
+_datasets = {}
+
+
+def _dataset(size: int):
+    if size not in _datasets:
+        _datasets[size] = make_contributor_df(size)
+    return _datasets[size]
+
+
+def _offline_fetcher():
+    """
+    A DataFetcher that skips the constructor's network call, for benchmarking parsing alone.
+    """
+    from src.data.data_fetcher import DataFetcher
+
+    fetcher = DataFetcher.__new__(DataFetcher)
+    fetcher.complete_list = []
+    fetcher.raw_contributor_zips = []
+    return fetcher
+
+
+@benchmark("fetch_gimmie_data", "rows")
+def _bench_fetch(size, options, stack):
+    from src.data.data_fetcher import DataFetcher
+
+    size = min(size, options.fetch_max_rows)
+    server = stack.enter_context(FECStubServer(make_transactions(size), latency=options.latency))
+    os.environ["FEC_API_BASE_URL"] = server.base_url
+    os.environ.setdefault("FEC_API_KEY", "DEMO_KEY")
+
+    def run():
+        fetcher = DataFetcher("2020", "P")
+        fetcher.gimmie_data()
+        assert len(fetcher.df) == size
+    return run, size
+
+
+@benchmark("get_transactions_on_page", "rows")
+def _bench_parse(size, options, stack):
+    transactions = make_transactions(size)
+    pages = [{"results": transactions[i:i + 100]} for i in range(0, size, 100)]
+
+    def run():
+        fetcher = _offline_fetcher()
+        for page in pages:
+            fetcher.info = page
+            fetcher._get_transactions_on_page()
+    return run, size
+
+
+def _employer_cleaner(size):
+    from src.data.clean_data import DataCleaner
+
+    df = _dataset(size).copy()
+    return DataCleaner(df, 0.8, "contributor_employer", 3, None)
+
+
+@benchmark("ngrams", "values")
+def _bench_ngrams(size, options, stack):
+    cleaner = _employer_cleaner(size)
+    values = cleaner.df[cleaner.column_name].unique()
+
+    def run():
+        for value in values:
+            cleaner._ngrams(value)
+    return run, len(values)
+
+
+@benchmark("awesome_cossim_top", "values")
+def _bench_cossim(size, options, stack):
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    cleaner = _employer_cleaner(size)
+    values = cleaner.df[cleaner.column_name].unique()
+    tf_idf_matrix = TfidfVectorizer(min_df=1, analyzer=cleaner._ngrams).fit_transform(values)
+    transposed = tf_idf_matrix.transpose().tocsr()
+
+    def run():
+        cleaner._awesome_cossim_top(tf_idf_matrix, transposed, 100)
+    return run, len(values)
+
+
+@benchmark("tfidf_cache_load", "values")
+def _bench_tfidf_cache(size, options, stack):
+    import tempfile
+    from src.data import tfidf_cache
+
+    cleaner = _employer_cleaner(size)
+    values = cleaner.df[cleaner.column_name].unique()
+    cache_dir = stack.enter_context(tempfile.TemporaryDirectory())
+    tfidf_cache.load_or_fit(values, cleaner._ngrams, 3, cleaner.column_name, cache_dir)
+
+    def run():
+        tfidf_cache.load_or_fit(values, cleaner._ngrams, 3, cleaner.column_name, cache_dir)
+    return run, len(values)
+
+
+@benchmark("replace_matches_df", "rows")
+def _bench_replace(size, options, stack):
+    from src.data.clean_data import DataCleaner
+
+    source = _dataset(size)
+
+    def run():
+        DataCleaner(source.copy(), 0.8, "contributor_employer", 3, None)._replace_matches_df()
+    return run, size
+
+
+def _measure(run, repeat: int, memory: bool):
+    """
+    Returns the best wall time of `repeat` calls of `run`, and the peak traced memory
+    of one extra call (tracemalloc slows the code down, so it is kept out of the timings).
+    """
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+
+    peak = None
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            run()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return min(timings), peak
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(names: list, sizes: list, options) -> dict:
+    results = []
+    for name in names:
+        prepare, units = BENCHMARKS[name]
+        for size in sizes:
+            with ExitStack() as stack:
+                run, count = prepare(size, options, stack)
+                seconds, peak = _measure(run, options.repeat, not options.no_memory)
+            results.append({
+                "benchmark": name,
+                "size": size,
+                "units": units,
+                "count": count,
+                "seconds": round(seconds, 6),
+                "per_second": round(count / seconds, 1) if seconds else None,
+                "peak_memory_mb": round(peak / 2 ** 20, 2) if peak is not None else None,
+            })
+            print(f"{name:<28} {size:>9} {count:>9} {units:<7} {seconds:>10.4f}s"
+                  f" {results[-1]['per_second'] or 0:>14,.0f}/s"
+                  f" {results[-1]['peak_memory_mb'] or 0:>9.1f} MB")
+    return {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+
+
+def compare(baseline_path: str, current_path: str, tolerance: float) -> int:
+    """
+    Prints the change in time and peak memory for every benchmark present in both files.
+    Returns 1 when anything got slower by more than `tolerance` (i.e. 0.1 = 10%), else 0.
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    with open(current_path) as f:
+        current = json.load(f)
+
+    old = {(r["benchmark"], r["size"]): r for r in baseline["results"]}
+    regressions = 0
+    print(f"{baseline.get('commit')} -> {current.get('commit')}")
+    for result in current["results"]:
+        before = old.get((result["benchmark"], result["size"]))
+        if before is None:
+            continue
+        change = result["seconds"] / before["seconds"] - 1 if before["seconds"] else 0
+        memory = ""
+        if before.get("peak_memory_mb") and result.get("peak_memory_mb") is not None:
+            memory = f"{result['peak_memory_mb'] / before['peak_memory_mb'] - 1:+8.1%} mem"
+        flag = ""
+        if change > tolerance:
+            regressions += 1
+            flag = "  REGRESSION"
+        print(f"{result['benchmark']:<28} {result['size']:>9} {before['seconds']:>10.4f}s"
+              f" -> {result['seconds']:>10.4f}s {change:+8.1%} time {memory}{flag}")
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000",
+                        help="comma separated dataset sizes in rows, i.e. 10000,100000,1000000")
+    parser.add_argument("--bench", default=",".join(BENCHMARKS),
+                        help=f"comma separated benchmarks to run, from: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per benchmark, the best is kept")
+    parser.add_argument("--no-memory", action="store_true", help="skip the peak-memory run")
+    parser.add_argument("--latency", type=float, default=0, help="seconds of latency the stub API adds per request")
+    parser.add_argument("--fetch-max-rows", type=int, default=100000,
+                        help="cap on rows served by the stub API in fetch_gimmie_data")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"),
+                        help="compare two result files instead of running benchmarks")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="slowdown allowed by --compare before it exits with 1")
+    options = parser.parse_args(argv)
+
+    if options.compare:
+        return compare(*options.compare, options.tolerance)
+
+    names = [name.strip() for name in options.bench.split(",") if name.strip()]
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+    sizes = [int(size) for size in options.sizes.split(",")]
+
+    report = run_benchmarks(names, sizes, options)
+    if options.output:
+        with open(options.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
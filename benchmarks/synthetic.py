@@ -0,0 +1,211 @@
+import random
+
+# Values that dominate real FEC employer/occupation columns
+COMMON_EMPLOYERS = [
+    "RETIRED", "NOT EMPLOYED", "SELF-EMPLOYED", "NONE", "INFORMATION REQUESTED",
+    "HOMEMAKER", "APPLE INC", "GOOGLE", "MICROSOFT CORPORATION", "AMAZON.COM",
+    "WALMART", "KAISER PERMANENTE", "US ARMY", "STATE OF CALIFORNIA", "UNIVERSITY OF IOWA",
+]
+COMMON_OCCUPATIONS = [
+    "RETIRED", "NOT EMPLOYED", "ATTORNEY", "PHYSICIAN", "TEACHER", "ENGINEER",
+    "HOMEMAKER", "CONSULTANT", "REGISTERED NURSE", "SOFTWARE ENGINEER", "PROFESSOR",
+    "SALES", "MANAGER", "OWNER", "INFORMATION REQUESTED",
+]
+NAME_PARTS = [
+    "ACME", "SUMMIT", "RIVER", "PRAIRIE", "EAGLE", "GRANITE", "HARBOR", "LIBERTY", "PIONEER",
+    "CEDAR", "MERIDIAN", "NORTHSTAR", "BLUE SKY", "KEYSTONE", "FRONTIER", "HERITAGE", "SUMMIT VIEW",
+]
+INDUSTRIES = [
+    "HEALTH", "FINANCIAL", "CONSTRUCTION", "LOGISTICS", "FARMS", "ENERGY", "DENTAL", "LAW",
+    "INSURANCE", "PHARMACEUTICALS", "REALTY", "MEDIA", "SYSTEMS", "FOODS", "CAPITAL",
+]
+SUFFIXES = ["", " INC", " LLC", " CORP", " CO", " GROUP", " & ASSOCIATES", ", INC."]
+JOB_WORDS = ["SENIOR", "ASSISTANT", "REGIONAL", "CHIEF", "LEAD", "STAFF", "ASSOCIATE"]
+JOB_ROLES = [
+    "ANALYST", "DIRECTOR", "ACCOUNTANT", "ARCHITECT", "PHARMACIST", "ELECTRICIAN", "FARMER",
+    "EXECUTIVE", "SCIENTIST", "DESIGNER", "REALTOR", "TECHNICIAN", "SUPERVISOR", "ADMINISTRATOR",
+]
+PLACES = [
+    ("SIOUX CITY", "IA", "51106"), ("DES MOINES", "IA", "50309"), ("OMAHA", "NE", "68102"),
+    ("BENTON", "AR", "72019"), ("ALISO VIEJO", "CA", "92656"), ("FRESNO", "CA", "93701"),
+    ("OSHKOSH", "WI", "54904"), ("GREENLAWN", "NY", "11740"), ("HOOSICK FALLS", "NY", "12090"),
+    ("NEW HOLLAND", "PA", "17557"), ("BELLVILLE", "OH", "44813"), ("CATALDO", "ID", "83810"),
+]
+COMMITTEES = [
+    ("BIDEN FOR PRESIDENT", "DEM"), ("DONALD J. TRUMP FOR PRESIDENT, INC.", "REP"),
+    ("WINRED", "REP"), ("ACTBLUE", "DEM"), ("JORGENSEN FOR PRESIDENT", "LIB"),
+    ("FRIENDS OF THE EARTH ACTION", None),
+]
+
+COLUMNS = [
+    "committee_name",
+    "contribution_receipt_amount",
+    "contributor_occupation",
+    "contributor_employer",
+    "contributor_street_1",
+    "contributor_street_2",
+    "contributor_city",
+    "contributor_state",
+    "contributor_zip",
+    "party",
+]
+
+
+def misspell(value: str, rng: random.Random) -> str:
+    """
+    Returns `value` with one realistic data-entry error applied,
+    i.e. a dropped, doubled or transposed letter, a changed suffix, or odd casing/punctuation.
+        "NOT EMPLOYED" -> "NOT EMPLOYEED", "APPLE INC" -> "APPLE, INC.", "RETIRED" -> "Retired"
+    """
+    kind = rng.randrange(7)
+    letters = [i for i, char in enumerate(value) if char.isalpha()]
+    if not letters:
+        return value + " "
+    i = rng.choice(letters)
+    if kind == 0:
+        return value[:i] + value[i + 1:]
+    if kind == 1:
+        return value[:i] + value[i] + value[i:]
+    if kind == 2 and i + 1 < len(value):
+        return value[:i] + value[i + 1] + value[i] + value[i + 2:]
+    if kind == 3:
+        for suffix in SUFFIXES[1:]:
+            if value.endswith(suffix):
+                return value[: -len(suffix)] + rng.choice(SUFFIXES)
+        return value + rng.choice(SUFFIXES[1:])
+    if kind == 4:
+        return value.title()
+    if kind == 5:
+        return value.replace(" ", "  ", 1) if " " in value else value + "."
+    return value.replace("-", " ") if "-" in value else value.lower()
+
+
+def _vocabulary(common: list, generate, size: int, rng: random.Random) -> list:
+    """
+    Builds the distinct "true" values for a column. Cardinality grows with the square root
+    of the dataset size, roughly what FEC pulls of increasing size show.
+    """
+    target = max(len(common), int(size ** 0.5) * 3)
+    values = list(common)
+    seen = set(values)
+    for _ in range(target * 20):
+        if len(values) >= target:
+            break
+        value = generate(rng)
+        if value not in seen:
+            seen.add(value)
+            values.append(value)
+    return values
+
+
+def _company(rng: random.Random) -> str:
+    if rng.random() < 0.5:
+        return f"{rng.choice(NAME_PARTS)} {rng.choice(INDUSTRIES)}{rng.choice(SUFFIXES)}"
+    return f"{rng.choice(NAME_PARTS)} {rng.choice(NAME_PARTS)} {rng.choice(INDUSTRIES)}{rng.choice(SUFFIXES)}"
+
+
+def _job(rng: random.Random) -> str:
+    if rng.random() < 0.5:
+        return f"{rng.choice(JOB_WORDS)} {rng.choice(JOB_ROLES)}"
+    return f"{rng.choice(JOB_WORDS)} {rng.choice(JOB_ROLES)} OF {rng.choice(INDUSTRIES)}"
+
+
+def _zipf_sampler(values: list, rng: random.Random, misspell_rate: float):
+    """
+    Returns a function drawing from `values` with a Zipf-like skew, so a few values
+    (RETIRED, NOT EMPLOYED...) dominate and there is a long tail, with `misspell_rate`
+    of draws replaced by a misspelled variant.
+    """
+    weights = [1 / (rank + 1) for rank in range(len(values))]
+    cum_weights = []
+    total = 0
+    for weight in weights:
+        total += weight
+        cum_weights.append(total)
+
+    def sample():
+        value = rng.choices(values, cum_weights=cum_weights)[0]
+        if rng.random() < misspell_rate:
+            value = misspell(value, rng)
+        return value
+
+    return sample
+
+
+def make_transactions(size: int, seed: int = 0, misspell_rate: float = 0.1) -> list:
+    """
+    Builds `size` synthetic schedule_a results shaped like the FEC API's JSON,
+    newest contribution first.
+
+    Parameters:
+        size: int
+            Number of transactions to generate.
+        seed: int (default=0)
+            Seed for the random generator, the same seed always gives the same data.
+        misspell_rate: float (default=0.1)
+            Share of employer/occupation values that get a data-entry error.
+
+    Returns:
+        A list of dicts with the keys DataFetcher._get_transactions_on_page() reads.
+    """
+    rng = random.Random(seed)
+    employer = _zipf_sampler(_vocabulary(COMMON_EMPLOYERS, _company, size, rng), rng, misspell_rate)
+    occupation = _zipf_sampler(_vocabulary(COMMON_OCCUPATIONS, _job, size, rng), rng, misspell_rate)
+
+    transactions = []
+    for index in range(size):
+        city, state, contributor_zip = rng.choice(PLACES)
+        zip_kind = rng.random()
+        if zip_kind < 0.3:
+            contributor_zip += f"{rng.randrange(10000):04d}"
+        elif zip_kind < 0.32:
+            contributor_zip = contributor_zip[:3]
+        elif zip_kind < 0.33:
+            contributor_zip = None
+        committee_name, party = rng.choice(COMMITTEES)
+        day = 366 - (index * 366 // size)
+        transactions.append({
+            "sub_id": str(4000000000000000000 + index),
+            "contribution_receipt_date": f"2020-{1 + (day - 1) // 31:02d}-{1 + (day - 1) % 28:02d}T00:00:00",
+            "committee": {"name": committee_name, "party": party},
+            "contribution_receipt_amount": round(rng.choice([5, 10, 25, 50, 100, 250, 500, 2800]) * rng.uniform(0.5, 1.5), 2),
+            "contributor_occupation": occupation(),
+            "contributor_employer": employer(),
+            "contributor_street_1": f"{rng.randrange(1, 9999)} {rng.choice(NAME_PARTS)} ST",
+            "contributor_street_2": None,
+            "contributor_city": city,
+            "contributor_state": state,
+            "contributor_zip": contributor_zip,
+        })
+    return transactions
+
+
+def make_contributor_df(size: int, seed: int = 0, misspell_rate: float = 0.1):
+    """
+    Same data as `make_transactions()` but shaped like the DataFrame DataFetcher saves
+    to `data/raw_data`, ready for DataCleaner.
+    """
+    import pandas as pd
+
+    rows = []
+    for item in make_transactions(size, seed, misspell_rate):
+        contributor_zip = item["contributor_zip"]
+        if contributor_zip and contributor_zip.isnumeric() and len(contributor_zip) >= 5:
+            contributor_zip = int(contributor_zip[:5])
+        else:
+            contributor_zip = 99999
+        rows.append([
+            item["committee"]["name"],
+            item["contribution_receipt_amount"],
+            item["contributor_occupation"],
+            item["contributor_employer"],
+            item["contributor_street_1"],
+            item["contributor_street_2"],
+            item["contributor_city"],
+            item["contributor_state"],
+            contributor_zip,
+            item["committee"]["party"],
+        ])
+    df = pd.DataFrame(rows, columns=COLUMNS)
+    df.fillna(value="", inplace=True)
+    return df
@@ -1,13 +1,4 @@
-from src.data.clean_data import clean_data
-import os
-import fnmatch
-
-
-path_pattern = "*.csv"
-files = os.listdir("data/raw_data/")
-for csv in files:
-    if fnmatch.fnmatch(csv, path_pattern):
-        clean_data(csv, .95, 3)
-        clean_data(csv, .9, 3)
-        clean_data(csv, .8, 3)
+from src.cli import main
 
+# Same as: python3 fec.py clean --similarity .95 .9 .8 --ngram-size 3
+main(["clean", "--similarity", ".95", ".9", ".8", "--ngram-size", "3"])
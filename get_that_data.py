@@ -1,6 +1,4 @@
-from src.data.data_fetcher import DataFetcher
+from src.cli import main
 
-fetcher = DataFetcher("2020", "A", "51106", "IA", "Sioux City")
-fetcher.api_starting_url_container
-fetcher.gimmie_data()
-fetcher.save_df_data() 
\ No newline at end of file
+# Same as: python3 fec.py fetch 2020 A --zip 51106 --state IA --city "Sioux City"
+main(["fetch", "2020", "A", "--zip", "51106", "--state", "IA", "--city", "Sioux City"])
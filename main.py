@@ -1,12 +1,18 @@
 import os
 import uvicorn
 import json
+import functools
 from fastapi import FastAPI, Request, Form
-from fastapi.responses import HTMLResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import HTMLResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel
-from src.data.data_fetcher import DataFetcher
+from src.data import metrics
+from src.data.data_fetcher import COLUMNS, DataFetcher, make_query_key
+from src.data.result_cache import ResultCache
+from src.analysis.contributions import ContributionAnalysis
+from src.analysis.zip_index import ZIP_CENTROIDS_PATH, load_zip_index
 
 
 # Instantiate fastAPI with appropriate descriptors
@@ -26,6 +32,48 @@ app.mount(
 app.mount(
     '/images', StaticFiles(directory='src/viz/templates/images/'), name='images')
 
+# Instantiate the shared query result cache
+# FEC_CACHE_MAX_ENTRIES and FEC_CACHE_TTL (seconds) can be set as environment variables
+result_cache = ResultCache(
+    max_entries=int(os.environ.get("FEC_CACHE_MAX_ENTRIES", 128)),
+    ttl=float(os.environ.get("FEC_CACHE_TTL", 900))
+)
+
+# The ZIP centroid index used to answer "near me" searches from local data is built on the first search with a postcode
+# FEC_ZIP_CENTROIDS (file path) and FEC_NEARBY_MILES can be set as environment variables
+nearby_miles = float(os.environ.get("FEC_NEARBY_MILES", 10))
+
+
+@functools.lru_cache(maxsize=1)
+def get_zip_index():
+    """
+    The ZipIndex of the centroid file, None when there is no such file.
+    """
+    return load_zip_index(os.environ.get("FEC_ZIP_CENTROIDS", ZIP_CENTROIDS_PATH))
+
+
+def saved_contributions_near(zip_index, election_year: str, election_type: str, postcode: str):
+    """
+    Contributions from zips within nearby_miles of `postcode` in the csv files saved by
+    earlier complete pulls, closest first. None unless saved files hold every contribution
+    from every nearby zip, or when DuckDB isn't installed or can't read the files.
+    """
+    nearby_zips = {zip_code: zip_index.state(zip_code) for zip_code, _ in zip_index.zips_near(postcode, nearby_miles)}
+    try:
+        analysis = ContributionAnalysis()
+    except ImportError:
+        return None
+    import duckdb
+
+    try:
+        zips_by_path = analysis.files_covering(nearby_zips, election_year, election_type)
+        if sum(len(zips) for zips in zips_by_path.values()) < len(nearby_zips):
+            return None
+        df = analysis.rows_by_file(COLUMNS, zips_by_path)
+    except duckdb.Error:
+        return None
+    return zip_index.contributions_near(df, postcode, nearby_miles)
+
 
 # Define routes
 
@@ -82,10 +130,32 @@ async def display_map_results(request: Request,
     """
     Displays the generic page with map results
     """
-    fetcher = DataFetcher(election_year, election_type, None, state, None)
-    fetcher.api_starting_url_container
-    fetcher.gimmie_data(record_limit=100)
-    fetcher.save_df_data() 
+    record_limit = 100
+
+    def fetch():
+        fetcher = DataFetcher(election_year, election_type, None, state, None)
+        fetcher.gimmie_data(record_limit=record_limit)
+        fetcher.save_df_data()
+        return fetcher.df, fetcher.pages_pulled >= fetcher.total_pages
+
+    # Identical queries share one pull, concurrent ones wait on the pull already running without taking a thread
+    key = make_query_key(election_year, election_type, None, state, None) + (record_limit,)
+    zip_index = await run_in_threadpool(get_zip_index) if postcode else None
+    if zip_index is None or postcode not in zip_index:
+        zip_index = None
+    nearby = None
+    nearby_partial = False
+    if zip_index is not None:
+        # Answer from earlier complete pulls saved to disk before falling back to pulling the state
+        nearby = await run_in_threadpool(saved_contributions_near, zip_index, election_year, election_type, postcode)
+    if nearby is None:
+        df, complete = await result_cache.get_or_compute_async(key, lambda: run_in_threadpool(fetch))
+        if zip_index is not None:
+            nearby = zip_index.contributions_near(df, postcode, nearby_miles)
+            # The pull stops at record_limit pages and only covers the form's state
+            nearby_partial = not complete or any(
+                zip_index.state(zip_code) != state.upper() for zip_code, _ in zip_index.zips_near(postcode, nearby_miles)
+            )
     return templates.TemplateResponse('generic.html',
                                         {"request": request,
                                         "election_year": election_year,
@@ -94,7 +164,34 @@ async def display_map_results(request: Request,
                                         "locality": locality,
                                         "state": state,
                                         "postcode": postcode,
-                                        "country": country})
+                                        "country": country,
+                                        "nearby": nearby,
+                                        "nearby_miles": nearby_miles,
+                                        "nearby_partial": nearby_partial})
+
+
+@app.get('/cache')
+async def display_cache():
+    """
+    Displays the contents and hit/miss counters of the query result cache
+    """
+    return result_cache.stats()
+
+
+@app.delete('/cache')
+async def clear_cache():
+    """
+    Empties the query result cache
+    """
+    return {"cleared": result_cache.clear()}
+
+
+@app.get('/metrics', response_class=PlainTextResponse)
+async def display_metrics():
+    """
+    Displays fetch, cache and cleaning metrics in the Prometheus text exposition format
+    """
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
 
 
 if __name__ == '__main__':
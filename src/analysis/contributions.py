@@ -0,0 +1,343 @@
+"""
+SQL analysis over the CSVs saved in data/raw_data and data/cleaned_data, run by the
+embedded DuckDB engine. Files are scanned in place, many at once and on every core,
+only the columns a query uses are parsed, and files are skipped up front when their
+name shows they can't match the requested period, committee type or state.
+"""
+import re
+import csv
+
+from src.data.catalog import RAW_DATA_DIR, CLEANED_DATA_DIR, list_datasets
+
+AMOUNT_COLUMN = "contribution_receipt_amount"
+
+# Read these as fixed types in every file so they line up when files are scanned together
+COLUMN_TYPES = {
+    "contributor_zip": "VARCHAR",
+    "contribution_receipt_amount": "DOUBLE",
+}
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+_COMMITTEE_TYPES = {"HOUSE": "H", "SENATE": "S", "PRESIDENTIAL": "P", "ALL": "A"}
+
+
+def _quote_identifier(name: str) -> str:
+    if not _IDENTIFIER.match(name):
+        raise ValueError(f"Invalid column name: {name!r}")
+    return f'"{name}"'
+
+
+def _quote_literal(value: str) -> str:
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _normalize_period(period) -> str:
+    if period is None or not str(period).isnumeric():
+        return None
+    period = int(period)
+    return str(period + 1 if period % 2 else period)
+
+
+def _normalize_committee_type(committee_type) -> str:
+    if committee_type is None:
+        return None
+    committee_type = str(committee_type).upper()
+    return _COMMITTEE_TYPES.get(committee_type, committee_type[:1])
+
+
+def _given(value) -> str:
+    """
+    A query detail read from a file name, None where the pull didn't set it.
+    """
+    return None if value in (None, "", "None") else value
+
+
+class ContributionAnalysis:
+    """
+    Runs the common aggregations over saved datasets without loading them into pandas first.
+
+    Parameters:
+        raw_dir: str (default="data/raw_data")
+        cleaned_dir: str (default="data/cleaned_data")
+            Where DataFetcher and clean_data saved their CSVs.
+
+        threads: int (optional)
+            Cores DuckDB may use, all of them by default.
+
+        database: str (default=":memory:")
+            DuckDB database file, only needed to keep views or tables made through `sql()`.
+
+    Usage:
+        analysis = ContributionAnalysis()
+        analysis.totals_by_party(period=2020, state="IA")
+        analysis.totals_by_employer(source="cleaned", similarity=0.9, limit=20)
+        analysis.raw_vs_cleaned("contributor_employer")
+
+    Rows are counted once per file they appear in, so pick files with `period`,
+    `committee_type` and `state` when saved pulls overlap (i.e. a state and a zip inside it).
+    """
+
+    def __init__(self, raw_dir: str = RAW_DATA_DIR, cleaned_dir: str = CLEANED_DATA_DIR, threads: int = None, database: str = ":memory:"):
+        try:
+            import duckdb
+        except ImportError as error:
+            raise ImportError(
+                "ContributionAnalysis needs DuckDB, install it with `pip install duckdb`"
+            ) from error
+
+        self.raw_dir = raw_dir
+        self.cleaned_dir = cleaned_dir
+        self.connection = duckdb.connect(database)
+        if threads:
+            self.connection.execute(f"SET threads TO {int(threads)}")
+
+    def files(self, source: str = "raw", period=None, committee_type: str = None, state: str = None, similarity: float = None) -> list:
+        """
+        Paths of the saved CSVs matching the given query details, read from their file names.
+        Files whose names don't follow the DataFetcher pattern are kept, they can't be ruled out.
+        """
+        if source not in ("raw", "cleaned"):
+            raise ValueError('source must be "raw" or "cleaned"')
+        directory = self.raw_dir if source == "raw" else self.cleaned_dir
+        wanted = {
+            "period": _normalize_period(period),
+            "committee_type": _normalize_committee_type(committee_type),
+            "state": state.upper() if state else None,
+        }
+
+        paths = []
+        for dataset in list_datasets(source, count_rows=False, directory=directory):
+            found = {
+                "period": _normalize_period(dataset["period"]),
+                "committee_type": _normalize_committee_type(dataset["committee_type"]),
+                "state": dataset["state"].upper() if dataset["state"] else None,
+            }
+            if any(value and found[field] and found[field] != value for field, value in wanted.items()):
+                continue
+            if similarity is not None and dataset.get("similarity") not in (None, float(similarity)):
+                continue
+            paths.append(dataset["path"])
+        return paths
+
+    def _scan(self, paths: list) -> str:
+        files = ", ".join(_quote_literal(path) for path in paths)
+        # DuckDB refuses types for columns none of the files have, so only type those that exist
+        present = set()
+        for path in paths:
+            with open(path, newline="") as f:
+                present.update(next(csv.reader(f), []))
+        types = ", ".join(
+            f"{_quote_literal(name)}: {_quote_literal(kind)}" for name, kind in COLUMN_TYPES.items() if name in present
+        )
+        options = f", types = {{{types}}}" if types else ""
+        return f"read_csv_auto([{files}], header = true, union_by_name = true, filename = true{options})"
+
+    def _where(self, filters: dict):
+        """
+        Turns {"party": "DEM", "contributor_state": ["IA", "NE"]} into a parameterized WHERE clause.
+        """
+        clauses = []
+        params = []
+        for column, value in (filters or {}).items():
+            if isinstance(value, (list, tuple, set)):
+                clauses.append(f"{_quote_identifier(column)} IN ({', '.join('?' for _ in value)})")
+                params.extend(str(item) for item in value)
+            else:
+                clauses.append(f"CAST({_quote_identifier(column)} AS VARCHAR) = ?")
+                params.append(str(value))
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def sql(self, query: str, params: list = None):
+        """
+        Runs any SQL against two views, `raw` and `cleaned`, over every saved file and
+        returns the result as a pandas DataFrame.
+            analysis.sql("SELECT party, count(*) FROM raw GROUP BY party")
+        """
+        for source in ("raw", "cleaned"):
+            paths = self.files(source)
+            if paths:
+                self.connection.execute(f"CREATE OR REPLACE VIEW {source} AS SELECT * FROM {self._scan(paths)}")
+        return self.connection.execute(query, params or []).df()
+
+    def rows(self, columns: list, source: str = "raw", filters: dict = None, period=None, committee_type: str = None, state: str = None, similarity: float = None):
+        """
+        The `columns` of every row matching `filters`, as a pandas DataFrame. File and filter
+        arguments work like totals_by(), see rows_by_file() to read overlapping pulls once.
+        """
+        import pandas as pd
+
+        selected = ", ".join(_quote_identifier(column) for column in columns)
+        paths = self.files(source, period, committee_type, state, similarity)
+        if not paths:
+            return pd.DataFrame(columns=columns)
+
+        where, params = self._where(filters)
+        query = f"SELECT {selected} FROM {self._scan(paths)}{where}"
+        return self.connection.execute(query, params).df()
+
+    def files_covering(self, zip_states: dict, period, committee_type: str) -> dict:
+        """
+        Picks, for every zip, one saved raw file holding all of that zip's contributions: one
+        pulled to its last page for the same period and committee type, with no city, and
+        for the zip's state and/or a prefix of the zip (the API matches contributor_zip by prefix).
+
+        Parameters:
+            zip_states: dict
+                Zip as saved in contributor_zip (i.e. 2134 for "02134") -> its state, or None
+                when unknown, in which case only zip pulls can hold it.
+            period, committee_type:
+                The query the contributions are for.
+
+        Returns:
+            A dict of path -> the zips to read from that file, fewest files first. Zips in no
+            list have no saved file holding all their contributions.
+        """
+        period = _normalize_period(period)
+        committee_type = _normalize_committee_type(committee_type)
+        candidates = []
+        for dataset in list_datasets("raw", count_rows=False, directory=self.raw_dir):
+            if dataset["total_pages"] is None or dataset["pages_pulled"] < dataset["total_pages"]:
+                continue
+            if _normalize_period(dataset["period"]) != period or _normalize_committee_type(dataset["committee_type"]) != committee_type:
+                continue
+            if _given(dataset["city"]):
+                continue
+            state = _given(dataset["state"])
+            prefix = _given(dataset["zip"])
+            covered = [
+                zip_code for zip_code, zip_state in zip_states.items()
+                if (prefix is None or str(zip_code).zfill(5).startswith(prefix))
+                and (state is None or state.upper() == zip_state)
+            ]
+            if covered:
+                candidates.append((dataset["path"], covered))
+
+        # Read each zip from the file covering the most zips, so overlapping pulls aren't read twice
+        candidates.sort(key=lambda candidate: len(candidate[1]), reverse=True)
+        zips_by_path = {}
+        assigned = set()
+        for path, covered in candidates:
+            zips = [zip_code for zip_code in covered if zip_code not in assigned]
+            if zips:
+                zips_by_path[path] = zips
+                assigned.update(zips)
+        return zips_by_path
+
+    def rows_by_file(self, columns: list, values_by_path: dict, column: str = "contributor_zip"):
+        """
+        The `columns` of the rows in each file whose `column` is one of that file's values, as
+        a pandas DataFrame, i.e. rows_by_file(COLUMNS, files_covering(...)). A row is only read
+        from the file it's listed under, so identical contributions are all kept.
+        """
+        import pandas as pd
+
+        selected = ", ".join(_quote_identifier(column) for column in columns)
+        if not values_by_path:
+            return pd.DataFrame(columns=columns)
+
+        clauses = []
+        params = []
+        for path, values in values_by_path.items():
+            clauses.append(
+                f"(filename = ? AND CAST({_quote_identifier(column)} AS VARCHAR) IN ({', '.join('?' for _ in values)}))"
+            )
+            params.append(path)
+            params.extend(str(value) for value in values)
+        query = f"SELECT {selected} FROM {self._scan(list(values_by_path))} WHERE {' OR '.join(clauses)}"
+        return self.connection.execute(query, params).df()
+
+    def totals_by(self, group_by, source: str = "raw", filters: dict = None, period=None, committee_type: str = None, state: str = None, similarity: float = None, limit: int = None):
+        """
+        Number of contributions and total amount for every value of `group_by`, largest total first.
+
+        Parameters:
+            group_by: str or list
+                Column(s) to group on, i.e. "party" or ["contributor_state", "party"].
+            source: str (default="raw")
+                "raw" or "cleaned" data.
+            filters: dict (optional)
+                Column -> value (or list of values) the rows must have.
+            period, committee_type, state: (optional)
+                Only read files saved for this query, see `files()`.
+            similarity: float
+                Which cleaned version to read, required when `source` is "cleaned".
+            limit: int (optional)
+                Return only the top `limit` groups.
+
+        Returns:
+            A pandas DataFrame with the `group_by` columns, `contributions` and `total_amount`.
+        """
+        import pandas as pd
+
+        columns = [group_by] if isinstance(group_by, str) else list(group_by)
+        if source == "cleaned" and similarity is None:
+            raise ValueError("Pick which cleaned files to read with similarity=, i.e. similarity=0.9")
+        selected = ", ".join(_quote_identifier(column) for column in columns)
+        paths = self.files(source, period, committee_type, state, similarity)
+        if not paths:
+            return pd.DataFrame(columns=columns + ["contributions", "total_amount"])
+
+        where, params = self._where(filters)
+        query = (
+            f"SELECT {selected}, count(*) AS contributions, sum({AMOUNT_COLUMN}) AS total_amount"
+            f" FROM {self._scan(paths)}{where}"
+            f" GROUP BY {selected} ORDER BY total_amount DESC, contributions DESC"
+        )
+        if limit:
+            query += f" LIMIT {int(limit)}"
+        return self.connection.execute(query, params).df()
+
+    def totals_by_party(self, **kwargs):
+        return self.totals_by("party", **kwargs)
+
+    def totals_by_committee(self, **kwargs):
+        return self.totals_by("committee_name", **kwargs)
+
+    def totals_by_employer(self, **kwargs):
+        return self.totals_by("contributor_employer", **kwargs)
+
+    def totals_by_zip(self, **kwargs):
+        return self.totals_by("contributor_zip", **kwargs)
+
+    def raw_vs_cleaned(self, column: str, filters: dict = None, period=None, committee_type: str = None, state: str = None):
+        """
+        How much cleaning combined the values of `column`: one row for the raw files and one
+        per similarity threshold of the cleaned files, with their row and distinct value counts.
+
+        Returns:
+            A pandas DataFrame with `similarity` (NaN for raw), `rows`, `distinct_values`
+            and `distinct_reduction`, the share of raw distinct values removed by cleaning.
+        """
+        import pandas as pd
+
+        quoted = _quote_identifier(column)
+        where, params = self._where(filters)
+        parts = []
+        all_params = []
+        raw_paths = self.files("raw", period, committee_type, state)
+        if raw_paths:
+            parts.append(
+                f"SELECT CAST(NULL AS DOUBLE) AS similarity, count(*) AS rows, count(DISTINCT {quoted}) AS distinct_values"
+                f" FROM {self._scan(raw_paths)}{where}"
+            )
+            all_params.extend(params)
+        cleaned_paths = self.files("cleaned", period, committee_type, state)
+        if cleaned_paths:
+            parts.append(
+                f"SELECT CAST(regexp_extract(filename, 'cleaned_([0-9.]+)_', 1) AS DOUBLE) AS similarity,"
+                f" count(*) AS rows, count(DISTINCT {quoted}) AS distinct_values"
+                f" FROM {self._scan(cleaned_paths)}{where} GROUP BY 1"
+            )
+            all_params.extend(params)
+        if not parts:
+            return pd.DataFrame(columns=["similarity", "rows", "distinct_values", "distinct_reduction"])
+
+        result = self.connection.execute(
+            " UNION ALL ".join(parts) + " ORDER BY similarity DESC NULLS FIRST", all_params
+        ).df()
+        raw_distinct = result.loc[result["similarity"].isna(), "distinct_values"]
+        if len(raw_distinct) and raw_distinct.iloc[0]:
+            result["distinct_reduction"] = 1 - result["distinct_values"] / raw_distinct.iloc[0]
+        else:
+            result["distinct_reduction"] = float("nan")
+        return result
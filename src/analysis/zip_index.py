@@ -0,0 +1,232 @@
+"""
+Spatial index of ZIP code centroids for radius and nearest-neighbour queries over
+contributor_zip values, answered locally instead of pulling a whole state from the API.
+
+data/geo/zip_centroids.csv ships with the repo: the zip, state, lat and lon of the 33,791
+ZCTAs in the uszipinfo 1.1.0 package's zip_metadata_2022.parquet (MIT), i.e. the 2022
+Census Gazetteer internal points and GeoNames states (CC BY 4.0), see data/geo/NOTICE.
+The Census Bureau's Gazetteer file itself, i.e.
+https://www2.census.gov/geo/docs/maps-data/data/gazetteer/2022_Gazetteer/2022_Gaz_zcta_national.zip
+unzipped, or any tab or comma separated file with a zip, latitude and longitude column
+works too. Without a state column saved state-wide pulls can't be matched to zips.
+"""
+import os
+import csv
+import math
+
+ZIP_CENTROIDS_PATH = "data/geo/zip_centroids.csv"
+
+EARTH_RADIUS_MILES = 3958.8
+
+# _get_transactions_on_page() stores zips it can't read as 99999
+UNKNOWN_ZIP = 99999
+
+_ZIP_COLUMNS = ["GEOID", "ZCTA5", "ZCTA", "ZIP", "ZIPCODE", "ZIP_CODE", "POSTCODE"]
+_LATITUDE_COLUMNS = ["INTPTLAT", "LAT", "LATITUDE"]
+_LONGITUDE_COLUMNS = ["INTPTLONG", "INTPTLON", "LON", "LNG", "LONG", "LONGITUDE"]
+_STATE_COLUMNS = ["STATE", "USPS", "STUSPS", "STATE_CODE"]
+
+
+def normalize_zip(zip_code) -> int:
+    """
+    Turns a zip into the int _get_transactions_on_page() stores in contributor_zip, so
+    "02134", "02134-1234", "021341234", 2134 and "2134" (how a saved csv reads it back)
+    all become 2134.
+    Returns None when it can't.
+    """
+    if zip_code is None:
+        return None
+    zip_code = str(zip_code).strip().split("-")[0]
+    if zip_code.endswith(".0"):
+        zip_code = zip_code[:-2]
+    if not zip_code.isnumeric():
+        return None
+    zip_code = int(zip_code[:5])
+    return None if zip_code == UNKNOWN_ZIP else zip_code
+
+
+def _pick_column(header: list, names: list, required: bool = True) -> int:
+    for name in names:
+        if name in header:
+            return header.index(name)
+    if not required:
+        return None
+    raise ValueError(f"No column named any of {', '.join(names)} in the centroid file")
+
+
+def read_centroids(path: str):
+    """
+    Reads a centroid file into four lists: zips (normalized ints), latitudes, longitudes
+    and states (None for every zip when the file has no state column).
+    Rows with an unreadable zip or coordinate are skipped.
+    """
+    with open(path, newline="") as f:
+        dialect = "excel-tab" if "\t" in f.readline() else "excel"
+        f.seek(0)
+        rows = csv.reader(f, dialect)
+        header = [name.strip().upper() for name in next(rows)]
+        zip_column = _pick_column(header, _ZIP_COLUMNS)
+        latitude_column = _pick_column(header, _LATITUDE_COLUMNS)
+        longitude_column = _pick_column(header, _LONGITUDE_COLUMNS)
+        state_column = _pick_column(header, _STATE_COLUMNS, required=False)
+
+        zips, latitudes, longitudes, states = [], [], [], []
+        for row in rows:
+            try:
+                zip_code = normalize_zip(row[zip_column])
+                latitude = float(row[latitude_column])
+                longitude = float(row[longitude_column])
+                state = (row[state_column].strip().upper() or None) if state_column is not None else None
+            except (IndexError, ValueError):
+                continue
+            if zip_code is not None:
+                zips.append(zip_code)
+                latitudes.append(latitude)
+                longitudes.append(longitude)
+                states.append(state)
+    return zips, latitudes, longitudes, states
+
+
+def _to_unit_vectors(latitudes, longitudes):
+    """
+    Points on the unit sphere, so straight-line (chord) distance orders points exactly
+    like great-circle distance and a plain k-d tree can be used.
+    """
+    import numpy as np
+
+    latitudes = np.radians(np.asarray(latitudes, dtype=float))
+    longitudes = np.radians(np.asarray(longitudes, dtype=float))
+    return np.column_stack([
+        np.cos(latitudes) * np.cos(longitudes),
+        np.cos(latitudes) * np.sin(longitudes),
+        np.sin(latitudes),
+    ])
+
+
+def _chord_to_miles(chord):
+    import numpy as np
+
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.clip(np.asarray(chord) / 2, 0, 1))
+
+
+def _miles_to_chord(miles: float) -> float:
+    return 2 * math.sin(min(miles / EARTH_RADIUS_MILES, math.pi) / 2)
+
+
+class ZipIndex:
+    """
+    k-d tree over ZIP centroids.
+
+    Parameters:
+        zips: list
+            Zip codes, normalized with normalize_zip().
+        latitudes: list
+        longitudes: list
+            Centroid of each zip in degrees.
+        states: list (optional)
+            Two letter state of each zip.
+
+    Usage:
+        index = ZipIndex.from_file("data/geo/zip_centroids.csv")
+        index.zips_near("51106", 10)
+            [(51106, 0.0), (51105, 3.6), ...] every zip within 10 miles, closest first.
+        index.contributions_near(df, "51106", 10)
+            rows of df from those zips, with a distance_miles column.
+    """
+
+    def __init__(self, zips: list, latitudes: list, longitudes: list, states: list = None):
+        import numpy as np
+        from scipy.spatial import cKDTree
+
+        self.zips = np.asarray(zips, dtype=np.int64)
+        self.latitudes = np.asarray(latitudes, dtype=float)
+        self.longitudes = np.asarray(longitudes, dtype=float)
+        self.states = list(states) if states is not None else [None] * len(self.zips)
+        self._positions = {int(zip_code): position for position, zip_code in enumerate(self.zips)}
+        self._points = _to_unit_vectors(self.latitudes, self.longitudes)
+        self._tree = cKDTree(self._points)
+
+    @classmethod
+    def from_file(cls, path: str = ZIP_CENTROIDS_PATH):
+        return cls(*read_centroids(path))
+
+    def __len__(self):
+        return len(self.zips)
+
+    def __contains__(self, zip_code):
+        return normalize_zip(zip_code) in self._positions
+
+    def location(self, zip_code):
+        """
+        (latitude, longitude) of a zip's centroid, None when the zip isn't indexed.
+        """
+        position = self._positions.get(normalize_zip(zip_code))
+        if position is None:
+            return None
+        return float(self.latitudes[position]), float(self.longitudes[position])
+
+    def state(self, zip_code) -> str:
+        """
+        Two letter state of a zip, None when the zip isn't indexed or the file had no states.
+        """
+        position = self._positions.get(normalize_zip(zip_code))
+        return None if position is None else self.states[position]
+
+    def nearest(self, latitude: float, longitude: float, k: int = 1) -> list:
+        """
+        The `k` zips closest to a point, as (zip, miles) pairs, closest first.
+        """
+        k = min(k, len(self))
+        if k < 1:
+            return []
+        chords, positions = self._tree.query(_to_unit_vectors([latitude], [longitude])[0], k=[*range(1, k + 1)])
+        return [(int(self.zips[position]), float(miles)) for position, miles in zip(positions, _chord_to_miles(chords))]
+
+    def within_radius(self, latitude: float, longitude: float, miles: float) -> list:
+        """
+        Every zip whose centroid is within `miles` of a point, as (zip, miles) pairs, closest first.
+        """
+        import numpy as np
+
+        point = _to_unit_vectors([latitude], [longitude])[0]
+        positions = np.asarray(self._tree.query_ball_point(point, _miles_to_chord(miles)), dtype=np.int64)
+        if not len(positions):
+            return []
+        distances = _chord_to_miles(np.linalg.norm(self._points[positions] - point, axis=1))
+        order = np.argsort(distances, kind="stable")
+        return [(int(self.zips[positions[i]]), float(distances[i])) for i in order]
+
+    def zips_near(self, zip_code, miles: float) -> list:
+        """
+        within_radius() around a zip's centroid, empty when the zip isn't indexed.
+        """
+        location = self.location(zip_code)
+        if location is None:
+            return []
+        return self.within_radius(*location, miles)
+
+    def contributions_near(self, df, zip_code, miles: float, zip_column: str = "contributor_zip"):
+        """
+        Rows of a contributions DataFrame (i.e. DataFetcher.df or a saved csv) from zips within
+        `miles` of `zip_code`, closest first, with the distance between zip centroids added
+        as a `distance_miles` column.
+        """
+        import numpy as np
+        import pandas as pd
+
+        distances = dict(self.zips_near(zip_code, miles))
+        # Look each distinct zip up once, then spread the distances back over the rows
+        codes, unique_zips = pd.factorize(df[zip_column])
+        unique_distances = np.array([distances.get(normalize_zip(value), np.nan) for value in unique_zips] + [np.nan])
+        row_distances = unique_distances[codes]
+        nearby = df.assign(distance_miles=row_distances)[~np.isnan(row_distances)]
+        return nearby.sort_values("distance_miles", kind="stable").reset_index(drop=True)
+
+
+def load_zip_index(path: str = ZIP_CENTROIDS_PATH):
+    """
+    ZipIndex of the centroid file at `path`, or None when there is no such file.
+    """
+    if not os.path.isfile(path):
+        return None
+    return ZipIndex.from_file(path)
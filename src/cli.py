@@ -0,0 +1,128 @@
+"""
+Command line entry point for pulling, cleaning and listing FEC datasets.
+
+Only the standard library is imported at module load, the fetcher and cleaner
+(and pandas, scikit-learn, etc. behind them) load when their command runs,
+so `--help` and `list` start instantly.
+"""
+import os
+import sys
+import argparse
+
+from src.data import tfidf_cache
+from src.data.catalog import list_datasets
+
+
+def _fetch(args):
+    from src.data.data_fetcher import DataFetcher
+
+    fetcher = DataFetcher(args.year, args.type, args.zip, args.state, args.city)
+    fetcher.gimmie_data(sleep_timer=args.sleep_timer, record_limit=args.record_limit)
+    fetcher.save_df_data()
+    return 0
+
+
+def _read_specs(path: str) -> list:
+    """
+    Reads one query per line: year,type,zip,state,city with empty fields left out.
+        i.e. 2020,A,51106,IA,Sioux City  or  2020,A,,IA
+    Blank lines and lines starting with # are skipped.
+    """
+    import csv
+
+    specs = []
+    with open(path, newline="") as f:
+        for row in csv.reader(f):
+            if not row or not "".join(row).strip() or row[0].lstrip().startswith("#"):
+                continue
+            fields = [field.strip() or None for field in row] + [None] * 5
+            specs.append(fields[:5])
+    return specs
+
+
+def _batch(args):
+    from src.data.batch_fetcher import BatchFetcher
+
+    batch = BatchFetcher(_read_specs(args.file), args.max_workers, args.calls_per_minute, args.record_limit)
+    print(f"{len(batch.specs)} queries planned as {len(batch.plan)} pulls")
+    results = batch.run()
+    batch.save_results(results)
+    return 0
+
+
+def _clean(args):
+    from src.data.clean_data import clean_data
+
+    if args.clear_tfidf_cache:
+        tfidf_cache.clear()
+    files = args.files or [dataset["name"] for dataset in list_datasets("raw", count_rows=False)]
+    for csv in files:
+        csv = os.path.basename(csv)
+        for similarity in args.similarity:
+            clean_data(csv, similarity, args.ngram_size, None if args.no_tfidf_cache else tfidf_cache.TFIDF_CACHE_DIR)
+    return 0
+
+
+def _list(args):
+    datasets = list_datasets(args.kind)
+    if not datasets:
+        print(f"No {args.kind} datasets found.")
+        return 0
+    for dataset in datasets:
+        details = " ".join(
+            f"{field}={dataset[field]}"
+            for field in ["similarity", "period", "committee_type", "state", "city", "zip"]
+            if dataset.get(field) not in (None, "", "None")
+        )
+        print(f"{dataset['name']}\t{dataset['rows']} rows\t{dataset['bytes']} bytes\t{details}")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="fec", description="Pull, clean and list FEC individual contribution data.")
+    commands = parser.add_subparsers(dest="command", metavar="command")
+    commands.required = True
+
+    fetch = commands.add_parser("fetch", help="pull contributions from the FEC API into data/raw_data")
+    fetch.add_argument("year", help="two-year transaction period, odd years round up (i.e. 2019 -> 2020)")
+    fetch.add_argument("type", help="H/house, S/senate, P/presidential or A/all")
+    fetch.add_argument("--zip", help="contributor zip code")
+    fetch.add_argument("--state", help="contributor two-letter state")
+    fetch.add_argument("--city", help="contributor city")
+    fetch.add_argument("--record-limit", type=int, help="stop after this many pages")
+    fetch.add_argument("--sleep-timer", type=int, default=0,
+                       help="seconds to wait when the per-minute call limit is hit")
+    fetch.set_defaults(handler=_fetch)
+
+    batch = commands.add_parser("batch", help="pull many queries at once, merging duplicate and overlapping ones")
+    batch.add_argument("file", help="CSV of queries, one per line: year,type,zip,state,city")
+    batch.add_argument("--max-workers", type=int, default=4, help="pulls running at the same time")
+    batch.add_argument("--calls-per-minute", type=int, default=120, help="API calls per minute shared by all pulls")
+    batch.add_argument("--record-limit", type=int, help="stop each pull after this many pages")
+    batch.set_defaults(handler=_batch)
+
+    clean = commands.add_parser("clean", help="combine similar values of data/raw_data files into data/cleaned_data")
+    clean.add_argument("files", nargs="*", help="file names in data/raw_data (default: every .csv)")
+    clean.add_argument("--similarity", type=float, nargs="+", default=[0.95, 0.9, 0.8],
+                       help="lowest_similarity thresholds, one cleaned file is written per value")
+    clean.add_argument("--ngram-size", type=int, default=3, help="size of character chunks compared")
+    clean.add_argument("--no-tfidf-cache", action="store_true",
+                       help=f"refit every TF-IDF matrix instead of reusing the ones saved in {tfidf_cache.TFIDF_CACHE_DIR}")
+    clean.add_argument("--clear-tfidf-cache", action="store_true",
+                       help=f"delete every TF-IDF matrix saved in {tfidf_cache.TFIDF_CACHE_DIR} before cleaning")
+    clean.set_defaults(handler=_clean)
+
+    catalog = commands.add_parser("list", help="list saved datasets")
+    catalog.add_argument("kind", nargs="?", choices=["raw", "cleaned"], default="raw")
+    catalog.set_defaults(handler=_list)
+
+    return parser
+
+
+def main(argv: list = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
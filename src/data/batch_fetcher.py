@@ -0,0 +1,255 @@
+import os
+import time
+import fnmatch
+import threading
+from collections import deque
+from typing import NamedTuple
+from concurrent.futures import ThreadPoolExecutor
+
+from src.data import metrics
+from src.data.data_fetcher import (
+    DataFetcher,
+    _handle_two_year_transaction_period,
+    _handle_recipient_committee_type,
+)
+
+
+class QuerySpec(NamedTuple):
+    """
+    The arguments of one DataFetcher query.
+        i.e. QuerySpec("2020", "A", "51106", "IA", "Sioux City")
+    """
+
+    two_year_transaction_period: str
+    recipient_committee_type: str
+    contributor_zip: str = None
+    contributor_state: str = None
+    contributor_city: str = None
+
+
+class _NormalizedQuery(NamedTuple):
+    period: str
+    committee_type: str
+    zip: str
+    state: str
+    city: str
+
+    def subsumes(self, other) -> bool:
+        """
+        True when every result of `other` is also a result of this query: same period and
+        committee type, and every location filter set here is set to the same value in `other`.
+            i.e. state=IA subsumes zip=51106 & state=IA & city=SIOUX CITY.
+        A zip or city query without a state is never assumed to be inside a state query,
+        we don't know which state a zip or city name belongs to.
+        """
+        if (self.period, self.committee_type) != (other.period, other.committee_type):
+            return False
+        return all(
+            mine is None or mine == theirs
+            for mine, theirs in [(self.zip, other.zip), (self.state, other.state), (self.city, other.city)]
+        )
+
+
+def _normalize(spec: QuerySpec) -> _NormalizedQuery:
+    """
+    Normalizes a QuerySpec the same way _make_api_url() builds its URL, so two specs that
+    produce the same API query compare equal.
+    """
+    contributor_zip = spec.contributor_zip
+    if contributor_zip:
+        contributor_zip = str(contributor_zip).strip()
+        # _handle_location_query() drops non-numeric zips and keeps the first 5 digits
+        contributor_zip = contributor_zip[:5] if contributor_zip.isnumeric() else None
+    contributor_state = spec.contributor_state.strip().upper() if spec.contributor_state else None
+    contributor_city = spec.contributor_city.strip().upper() if spec.contributor_city else None
+
+    return _NormalizedQuery(
+        _handle_two_year_transaction_period(spec.two_year_transaction_period),
+        _handle_recipient_committee_type(spec.recipient_committee_type),
+        contributor_zip or None,
+        contributor_state or None,
+        contributor_city or None,
+    )
+
+
+class PlannedPull(NamedTuple):
+    """
+    One API pull the planner decided to make, and the original specs answered from its results.
+    """
+
+    spec: QuerySpec
+    members: list
+
+
+def plan_queries(specs: list, merge_subsumed: bool = True) -> list:
+    """
+    Plans the fewest pulls that answer every spec in `specs`.
+
+    Duplicate specs (equal after normalization) share one pull. With `merge_subsumed`,
+    a spec whose results are a subset of another spec's, i.e. a zip inside a state that is
+    pulled in full anyway, is answered from the superset pull instead of its own.
+
+    Returns:
+        A list of PlannedPull, in the order their first spec appears in `specs`.
+    """
+    normalized = {}
+    for spec in specs:
+        normalized.setdefault(_normalize(spec), []).append(spec)
+
+    queries = list(normalized)
+    roots = {}
+    for query in queries:
+        root = query
+        if merge_subsumed:
+            # The most general query covering this one, so chains (state > city > zip) collapse into one pull
+            covering = [other for other in queries if other != query and other.subsumes(query)]
+            if covering:
+                root = min(covering, key=lambda other: sum(value is not None for value in other[2:]))
+        roots.setdefault(root, []).append(query)
+
+    pulls = []
+    for root, members in roots.items():
+        pull_spec = normalized[root][0]
+        pulls.append(PlannedPull(pull_spec, [spec for member in members for spec in normalized[member]]))
+    return pulls
+
+
+class RateBudget:
+    """
+    Sliding-window API call budget shared by every DataFetcher of a batch.
+
+    Parameters:
+        calls_per_window: int (default=120)
+            API calls allowed per `window` seconds across all fetchers, the same 120
+            a single DataFetcher allows itself.
+
+        window: float (default=60)
+            Length, in seconds, of the window.
+    """
+
+    def __init__(self, calls_per_window: int = 120, window: float = 60):
+        self.calls_per_window = calls_per_window
+        self.window = window
+        self._calls = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Blocks until a call fits in the budget, then records it.
+        """
+        waited = 0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._calls and self._calls[0] <= now - self.window:
+                    self._calls.popleft()
+                if len(self._calls) < self.calls_per_window:
+                    self._calls.append(now)
+                    break
+                pause = self._calls[0] + self.window - now
+            if not waited:
+                metrics.increment("fec_rate_limit_waits_total")
+            waited += pause
+            time.sleep(pause)
+        if waited:
+            metrics.increment("fec_rate_limit_wait_seconds_total", waited)
+
+
+def _filter_df(df, spec: QuerySpec, raw_zips: list):
+    """
+    Picks the rows of a superset pull's DataFrame that `spec` would have pulled itself.
+    `raw_zips` are the zips as the API sent them, one per row of `df`. The API matches
+    contributor_zip by prefix, so "5110" matches "51106" and "51106-1234", which df
+    stores as 51106 and 99999.
+    """
+    import pandas as pd
+
+    query = _normalize(spec)
+    keep = None
+    if query.zip:
+        keep = pd.Series([str(raw_zip).startswith(query.zip) for raw_zip in raw_zips], index=df.index, dtype=bool)
+    if query.state:
+        matches = df["contributor_state"].astype(str).str.upper() == query.state
+        keep = matches if keep is None else keep & matches
+    if query.city:
+        matches = df["contributor_city"].astype(str).str.upper() == query.city
+        keep = matches if keep is None else keep & matches
+    if keep is None:
+        return df.copy()
+    return df[keep].reset_index(drop=True)
+
+
+class BatchFetcher:
+    """
+    Runs many DataFetcher queries as one batch: duplicates and queries contained in another
+    query are answered from a single pull, the remaining pulls run concurrently under one
+    shared call budget, and results are split back per original query.
+
+    Parameters:
+        specs: list
+            QuerySpec (or tuples with the same fields) for every query wanted.
+                i.e. [("2020", "A", None, "IA"), ("2020", "A", "51106", "IA", "Sioux City")]
+                pulls Iowa once and answers the Sioux City query from it.
+
+        max_workers: int (default=4)
+            Pulls running at the same time.
+
+        calls_per_window: int (default=120)
+            API calls allowed per minute across the whole batch.
+
+        record_limit: int (optional)
+            Passed to gimmie_data(). A truncated superset can't answer its subsets, so
+            with a limit only duplicate queries are merged.
+
+    Usage:
+        batch = BatchFetcher(specs)
+        results = batch.run()
+            results[spec] is the DataFrame for each spec in `specs`.
+    """
+
+    def __init__(self, specs: list, max_workers: int = 4, calls_per_window: int = 120, record_limit: int = None):
+        self.specs = [spec if isinstance(spec, QuerySpec) else QuerySpec(*spec) for spec in specs]
+        self.max_workers = max_workers
+        self.record_limit = record_limit
+        self.rate_budget = RateBudget(calls_per_window)
+        self.plan = plan_queries(self.specs, merge_subsumed=record_limit is None)
+        self.fetchers = {}
+
+    def _pull(self, pull: PlannedPull):
+        fetcher = DataFetcher(*pull.spec, rate_budget=self.rate_budget)
+        fetcher.gimmie_data(record_limit=self.record_limit)
+        self.fetchers[pull.spec] = fetcher
+        return fetcher
+
+    def run(self) -> dict:
+        """
+        Makes every planned pull and returns a dict of original spec -> DataFrame.
+        """
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            fetchers = executor.map(self._pull, self.plan)
+            for pull, fetcher in zip(self.plan, fetchers):
+                pulled = _normalize(pull.spec)
+                for spec in pull.members:
+                    if _normalize(spec) == pulled:
+                        results[spec] = fetcher.df
+                    else:
+                        results[spec] = _filter_df(fetcher.df, spec, fetcher.raw_contributor_zips)
+        return results
+
+    def save_results(self, results: dict):
+        """
+        Writes every spec's DataFrame to `data/raw_data` under the same name DataFetcher.save_df_data()
+        would have used for it, replacing earlier pulls of the same query. The page counts in the
+        name are those of the pull the spec was answered from.
+        """
+        for pull in self.plan:
+            fetcher = self.fetchers[pull.spec]
+            for spec in pull.members:
+                query_name = (f"{spec.recipient_committee_type}_in_{spec.two_year_transaction_period}"
+                              f"_for_{spec.contributor_city}_{spec.contributor_state}_{spec.contributor_zip}.csv")
+                for name in os.listdir("data/raw_data"):
+                    if fnmatch.fnmatch(name, f"*_{query_name}"):
+                        os.remove("data/raw_data/" + name)
+                results[spec].to_csv(
+                    f"data/raw_data/{fetcher.pages_pulled}_of_{fetcher.total_pages}_for_{query_name}")
@@ -0,0 +1,79 @@
+"""
+Finds the datasets saved in data/raw_data and data/cleaned_data and reads the query
+details back out of their file names. Standard library only, so it is cheap to import.
+"""
+import os
+import re
+import fnmatch
+
+RAW_DATA_DIR = "data/raw_data"
+CLEANED_DATA_DIR = "data/cleaned_data"
+
+# Names written by DataFetcher.save_df_data() and clean_data.write_df_as_csv()
+RAW_NAME = re.compile(
+    r"^(?P<pages_pulled>\d+)_of_(?P<total_pages>\d+)_for_(?P<committee_type>.+?)_in_(?P<period>\d+)"
+    r"_for_(?P<city>.*)_(?P<state>[^_]*)_(?P<zip>[^_]*)\.csv$"
+)
+CLEANED_NAME = re.compile(r"^cleaned_(?P<similarity>[\d.]+)_(?P<raw_name>.+\.csv)$")
+
+
+def _count_rows(path: str) -> int:
+    """
+    Counts the data rows of a CSV without parsing it (line count minus the header).
+    """
+    lines = 0
+    last = b"\n"
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            lines += chunk.count(b"\n")
+            last = chunk[-1:]
+    if last != b"\n":
+        lines += 1
+    return max(lines - 1, 0)
+
+
+def list_datasets(kind: str = "raw", count_rows: bool = True, directory: str = None) -> list:
+    """
+    Describes every CSV saved in `data/raw_data` or `data/cleaned_data`.
+
+    Parameters:
+        kind: str (default="raw")
+            "raw" or "cleaned".
+        count_rows: bool (default=True)
+            Count each file's rows, which reads every file once.
+        directory: str (optional)
+            Look somewhere other than the default folder for `kind`.
+
+    Returns:
+        A list of dicts with the file name and path, size in bytes, row count (None without
+        `count_rows`), the query details and pages pulled out of the total parsed from the
+        file name (None where the name doesn't follow the pattern).
+    """
+    if directory is None:
+        directory = RAW_DATA_DIR if kind == "raw" else CLEANED_DATA_DIR
+    if not os.path.isdir(directory):
+        return []
+
+    datasets = []
+    for name in sorted(os.listdir(directory)):
+        if not fnmatch.fnmatch(name, "*.csv"):
+            continue
+        path = os.path.join(directory, name)
+        info = {
+            "name": name,
+            "path": path,
+            "bytes": os.path.getsize(path),
+            "rows": _count_rows(path) if count_rows else None,
+        }
+        raw_name = name
+        if kind == "cleaned":
+            match = CLEANED_NAME.match(name)
+            info["similarity"] = float(match["similarity"]) if match else None
+            raw_name = match["raw_name"] if match else ""
+        match = RAW_NAME.match(raw_name)
+        for field in ["period", "committee_type", "city", "state", "zip"]:
+            info[field] = match[field] if match else None
+        for field in ["pages_pulled", "total_pages"]:
+            info[field] = int(match[field]) if match else None
+        datasets.append(info)
+    return datasets
@@ -1,19 +1,19 @@
-import pandas as pd
-import fnmatch
+import time
+from typing import TYPE_CHECKING
+from src.data import metrics, tfidf_cache
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 # Imports for ngrams()
 import re
-from ftfy import fix_text
-
-# Imports for awesome_cossim_top()
-import numpy as np
-from scipy.sparse import csr_matrix, isspmatrix_csr
-import sparse_dot_topn.sparse_dot_topn as ct
 
-# Import for vectorize
-from sklearn.feature_extraction.text import TfidfVectorizer
+# pandas, numpy, scipy, sparse_dot_topn, scikit-learn and ftfy take seconds to import,
+# so they are imported inside the functions that use them rather than at module load.
 
 def _csv_to_df(path: str):
+    import pandas as pd
+
     df = pd.read_csv(f"data/raw_data/{path}", index_col=0)
     df.fillna(value="", inplace=True)
     return df
@@ -48,16 +48,21 @@ class DataCleaner:
             Size of string chunks used to assess similarity between two values.
             3 is normally best but values between 2 and 5 can work.
 
+        tfidf_cache_dir: str (default="data/tfidf_cache")
+            Where fitted TF-IDF matrices are stored and reused, see tfidf_cache.load_or_fit().
+            None always refits.
+
     Returns:
         A Pandas DataFrame with similar values of column_name combined.
 
     """
 
-    def __init__(self, path: pd.DataFrame, lowest_similarity: float, column_name: str, ngram_size: int):
+    def __init__(self, path: "pd.DataFrame", lowest_similarity: float, column_name: str, ngram_size: int, tfidf_cache_dir: str = tfidf_cache.TFIDF_CACHE_DIR):
         self.df = path
         self.lowest_similarity = lowest_similarity
         self.column_name = column_name
         self.ngram_size = ngram_size
+        self.tfidf_cache_dir = tfidf_cache_dir
         
 
     def _ngrams(self, string):
@@ -72,6 +77,8 @@ class DataCleaner:
                 i.e. testing with self.ngram_size of 3
                     [' Te', 'Tes', 'est', 'sti', 'tin', 'ing', 'ng ']
         """
+        from ftfy import fix_text
+
         string = str(string)
         string = fix_text(string) # fix text
         string = string.encode("ascii", errors="ignore").decode() #remove non ascii chars
@@ -107,6 +114,10 @@ class DataCleaner:
             N.B. if A and B are not CSR format, they will be converted to CSR
 
         """
+        import numpy as np
+        from scipy.sparse import csr_matrix, isspmatrix_csr
+        import sparse_dot_topn.sparse_dot_topn as ct
+
         if not isspmatrix_csr(A):
             A = A.tocsr()
 
@@ -150,62 +161,130 @@ class DataCleaner:
         return csr_matrix((data,indices,indptr),shape=(M,N))
 
 
+    def _get_matches_codes(self, sparse_matrix):
+        """
+        Uses sparse_matrix from _awesome_cossim_top, whose rows and columns are the codes of the
+        unique column values (their position in the categories table from _factorize).
+
+        Returns three aligned arrays: left_side codes, right_side codes and their similarity as a float.
+        """
+        import numpy as np
+
+        sparse_matrix = sparse_matrix.tocsr()
+        nnz = sparse_matrix.indptr[-1]
+        left_side = np.repeat(np.arange(sparse_matrix.shape[0], dtype=np.int32), np.diff(sparse_matrix.indptr))
+        right_side = np.asarray(sparse_matrix.indices[:nnz])
+        similarity = np.asarray(sparse_matrix.data[:nnz], dtype=float)
+        stored = similarity != 0
+        return left_side[stored], right_side[stored], similarity[stored]
+
+
     def _get_matches_df(self, sparse_matrix, name_vector):
         """
         Uses sparse_matrix from _awesome_cossim_top and vector of unique column values from df.
         
         Outputs a Pandas DataFrame of matches and their similarity percentage as a float.
         """
-        non_zeros = sparse_matrix.nonzero()
-    
-        sparserows = non_zeros[0]
-        sparsecols = non_zeros[1]
-    
-        nr_matches = sparsecols.size
-    
-        left_side = np.empty([nr_matches], dtype=object)
-        right_side = np.empty([nr_matches], dtype=object)
-        similarity = np.zeros(nr_matches)
+        import numpy as np
+        import pandas as pd
 
-        for index in range(0, nr_matches):
-            left_side[index] = name_vector[sparserows[index]]
-            right_side[index] = name_vector[sparsecols[index]]
-            similarity[index] = sparse_matrix.data[index]
+        left_codes, right_codes, similarity = self._get_matches_codes(sparse_matrix)
+        name_vector = np.asarray(name_vector, dtype=object)
 
         return pd.DataFrame({
-                        'left_side': left_side,
-                        'right_side': right_side,
+                        'left_side': name_vector[left_codes],
+                        'right_side': name_vector[right_codes],
                         'similarity': similarity
                         })
 
 
+    def _factorize(self):
+        """
+        Factorizes self.column_name once into integer codes (one per row) and a categories table of
+        its unique values, in order of first appearance like Series.unique().
+        Rows holding NaN get the code -1.
+        """
+        import pandas as pd
+
+        return pd.factorize(self.df[self.column_name])
+
+
+    def _merge_categories(self, left_codes, right_codes, counts):
+        """
+        Decides, for every category, which category its rows end up holding.
+
+        Walks the matches in order and moves every row currently holding right_side over to
+        left_side when left_side is currently held by more rows, the same rule as comparing
+        row counts of the values in the DataFrame. Rows move as a group, so this is a
+        union-find over the categories table: a category is a root while rows hold it.
+
+        Returns:
+            A list mapping every category code to the code of its final value.
+        """
+        counts = list(counts)
+        parent = list(range(len(counts)))
+        for left_side, right_side in zip(left_codes.tolist(), right_codes.tolist()):
+            # A value no row holds any more (merged away earlier) has a count of 0,
+            # as a left_side it never wins, as a right_side there is nothing left to move.
+            right_count = counts[right_side]
+            if right_count and counts[left_side] > right_count:
+                parent[right_side] = left_side
+                counts[left_side] += right_count
+                counts[right_side] = 0
+
+        for code in range(len(parent)):
+            root = code
+            while parent[root] != root:
+                root = parent[root]
+            while parent[code] != root:
+                parent[code], code = root, parent[code]
+        return parent
+
+
     def _replace_matches_df(self):
         """
         Replaces matches using all the other DataCleaner methods.
-        Using unique column values, TfidVectorizer uses _ngrams to produce a Tf-idf-weighted document-term matrix.
-        _awesome_cossim_top then finds the similarity between column values, returning a df, then all exact matches are removed.
-        Finally replacing the original values of the df.
+        The column is factorized once into integer codes and a table of its unique values.
+        Using those unique values, TfidVectorizer uses _ngrams to produce a Tf-idf-weighted document-term matrix,
+        or the matrix is memory-mapped from the TF-IDF cache if this column content was vectorized before.
+        _awesome_cossim_top then finds the similarity between column values, all exact matches are removed
+        and the matching codes decide which unique value each category is rewritten to.
+        Finally the column of the df is rebuilt from the rewritten categories table.
         """
-        unique_names = self.df[self.column_name].unique()
-        #print(len(unique_names))  # Uncomment to compare how many values have been combined
-        vectorizer = TfidfVectorizer(min_df=1, analyzer=self._ngrams)
-        tf_idf_matrix = vectorizer.fit_transform(unique_names)
-        matches = self._awesome_cossim_top(tf_idf_matrix, tf_idf_matrix.transpose(), 100)
-        matches_df = self._get_matches_df(matches, unique_names)
-        matches_df = matches_df[matches_df['similarity'] < 0.99999] # Remove all exact matches
+        import numpy as np
+
+        labels = {"column": self.column_name}
+        started = time.perf_counter()
+        codes, unique_names = self._factorize()
+        metrics.set_gauge("fec_clean_unique_values", len(unique_names), {**labels, "phase": "before"})
+        with metrics.timer("fec_clean_stage_seconds", {**labels, "stage": "vectorize"}):
+            tf_idf_matrix, transposed = tfidf_cache.load_or_fit(
+                unique_names, self._ngrams, self.ngram_size, self.column_name, self.tfidf_cache_dir)
+        with metrics.timer("fec_clean_stage_seconds", {**labels, "stage": "cossim"}):
+            matches = self._awesome_cossim_top(tf_idf_matrix, transposed, 100)
+        with metrics.timer("fec_clean_stage_seconds", {**labels, "stage": "matches"}):
+            left_codes, right_codes, similarity = self._get_matches_codes(matches)
+            not_exact = similarity < 0.99999 # Remove all exact matches
+            left_codes, right_codes = left_codes[not_exact], right_codes[not_exact]
         # Future improvement: Use the highest value count of either left or right side to determine which to use as final value.
-        for left_side, right_side in zip(matches_df['left_side'], matches_df['right_side']):
-            left_count = len(self.df.loc[self.df[self.column_name] == left_side])
-            right_count = len(self.df.loc[self.df[self.column_name] == right_side])
-            for position, column in zip(self.df.index, self.df[self.column_name]):
-                if column == right_side:
-                    if left_count > right_count:
-                        self.df.at[position, self.column_name] = left_side
-        #print(len(self.df[self.column_name].unique())) # Uncomment to compare how many values have been combined
+        with metrics.timer("fec_clean_stage_seconds", {**labels, "stage": "replace"}):
+            counts = np.bincount(codes[codes >= 0], minlength=len(unique_names))
+            final_codes = np.asarray(self._merge_categories(left_codes, right_codes, counts), dtype=np.intp)
+            if (final_codes != np.arange(len(unique_names))).any():
+                values = unique_names.take(final_codes).to_numpy()[codes]
+                missing = codes < 0
+                if missing.any():
+                    values = values.astype(object)
+                    values[missing] = self.df[self.column_name].to_numpy()[missing]
+                self.df[self.column_name] = values
+        metrics.set_gauge("fec_clean_unique_values", len(np.unique(final_codes)), {**labels, "phase": "after"})
+        elapsed = time.perf_counter() - started
+        if elapsed > 0:
+            metrics.set_gauge("fec_clean_rows_per_second", len(self.df) / elapsed, labels)
         return self.df
 
 
-def clean_data(path: str, lowest_similarity: float, ngram_size: int):
+def clean_data(path: str, lowest_similarity: float, ngram_size: int, tfidf_cache_dir: str = tfidf_cache.TFIDF_CACHE_DIR):
     """
     Takes a csv file and combines similar values using ngram_size to determine string chunk sizing.
     
@@ -219,6 +298,8 @@ def clean_data(path: str, lowest_similarity: float, ngram_size: int):
         ngram_size: int
             Size of string chunks used to assess similarity between two values.
             3 is normally best but values between 2 and 5 can work.
+        tfidf_cache_dir: str (default="data/tfidf_cache")
+            Where fitted TF-IDF matrices are reused from, None always refits.
 
     Returns:
         A csv file with all columns' values with similarity at or above lowest_similarity combined.
@@ -237,11 +318,11 @@ def clean_data(path: str, lowest_similarity: float, ngram_size: int):
             continue
         print(f"Cleaning {column} column of {path}")
         if count < 1:
-            name_list[count] = DataCleaner(df, lowest_similarity, column, ngram_size)
+            name_list[count] = DataCleaner(df, lowest_similarity, column, ngram_size, tfidf_cache_dir)
             count += 1
             name_list[count-1]
         
-        name_list[count] = DataCleaner(replace(name_list[count-1]), lowest_similarity, column, ngram_size)
+        name_list[count] = DataCleaner(replace(name_list[count-1]), lowest_similarity, column, ngram_size, tfidf_cache_dir)
         count += 1
         name_list[count-1]
     write_df_as_csv(replace(name_list[count-1]), f"cleaned_{lowest_similarity}_{path}")
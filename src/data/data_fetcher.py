@@ -1,9 +1,26 @@
 import os
 import json
 import time
-import requests
 import fnmatch
-import pandas as pd
+from src.data import metrics
+
+# Columns of DataFetcher.df and of the csv files it saves
+COLUMNS = [
+    "committee_name",
+    "contribution_receipt_amount",
+    "contributor_occupation",
+    "contributor_employer",
+    "contributor_street_1",
+    "contributor_street_2",
+    "contributor_city",
+    "contributor_state",
+    "contributor_zip",
+    "party",
+]
+
+# Seconds waited after a 429 without a Retry-After header, doubling for every 429 in a row up to the max
+RATE_LIMIT_BACKOFF = 1
+RATE_LIMIT_BACKOFF_MAX = 60
 
 
 class APIStartingURLContainer:
@@ -19,6 +36,53 @@ class APIStartingURLContainer:
         return self.url
 
 
+class RateLimitedError(Exception):
+    """
+    Raised when the API answers 429 Too Many Requests.
+    retry_after is the Retry-After header in seconds, None when it wasn't sent.
+    """
+
+    def __init__(self, retry_after: float = None):
+        super().__init__("The FEC API rate limit was exceeded")
+        self.retry_after = retry_after
+
+
+def _rate_limit_pause(retry_after: float, attempt: int) -> float:
+    """
+    Seconds to wait before retrying after the `attempt`th 429 in a row: the Retry-After
+    the API sent, or else an exponential backoff.
+        i.e. 1, 2, 4, ... up to 60 seconds.
+    """
+    if retry_after is not None:
+        return retry_after
+    return min(RATE_LIMIT_BACKOFF * 2 ** (attempt - 1), RATE_LIMIT_BACKOFF_MAX)
+
+
+def _timed_get(url: str):
+    """
+    GET `url` and decode its JSON body, reporting request latency, HTTP status and decode
+    time to `metrics`.
+
+    Returns:
+        info: dict
+            The decoded JSON of the response.
+
+    Raises:
+        RateLimitedError when the API answers 429.
+    """
+    import requests
+
+    with metrics.timer("fec_api_request_seconds"):
+        uh = requests.get(url)
+    metrics.increment("fec_api_requests_total", labels={"status": uh.status_code})
+    if uh.status_code == 429:
+        retry_after = uh.headers.get("Retry-After", "")
+        raise RateLimitedError(float(retry_after) if retry_after.isnumeric() else None)
+    data = uh.text
+    with metrics.timer("fec_json_parse_seconds"):
+        return json.loads(data)
+
+
 def _get_total_pages_for_call(api_starting_url_container: APIStartingURLContainer):
     """
     At the bottom of the JSON, on the first page of an API call, there's a 'pagination' key
@@ -42,9 +106,7 @@ def _get_total_pages_for_call(api_starting_url_container: APIStartingURLContaine
             + " `api_starting_url_container` object, built from `make_api_url()`"
         )
 
-    uh = requests.get(api_starting_url_container.url)
-    data = uh.text
-    info = json.loads(data)
+    info = _timed_get(api_starting_url_container.url)
 
     pages = info["pagination"]["pages"]
     return pages
@@ -70,7 +132,9 @@ def _make_api_url(
         A URL string for either House, Senate, or Presidential political campaigns from a specified two year period.
     """
 
-    base_api_url = "https://api.open.fec.gov/v1/schedules/schedule_a/?"
+    # FEC_API_BASE_URL can be set to point the fetcher at a mirror or a local stand-in server
+    base_api_url = os.environ.get(
+        "FEC_API_BASE_URL", "https://api.open.fec.gov/v1").rstrip("/") + "/schedules/schedule_a/?"
     set_parameters = "&sort=-contribution_receipt_date&sort_hide_null=true&sort_null_only=false&is_individual=true&contributor_type=individual&per_page=100"
 
     api_key = os.environ.get("FEC_API_KEY")
@@ -135,6 +199,30 @@ def _handle_location_query(contributor_zip: str, contributor_state: str, contrib
     return location_query
 
 
+def make_query_key(
+    two_year_transaction_period: int, recipient_committee_type: str, contributor_zip: str = None, contributor_state: str = None, contributor_city: str = None
+) -> tuple:
+    """
+    Normalizes DataFetcher parameters into a hashable key, so that queries that would
+    build the same API URL (i.e. "2019"/"2020", "house"/"H", "51106-1234"/"51106") share one key.
+
+    Returns:
+        A tuple of (two_year_transaction_period, recipient_committee_type, location_query) strings.
+    """
+    if contributor_state:
+        contributor_state = contributor_state.strip().upper()
+    if contributor_city:
+        contributor_city = contributor_city.strip()
+    if contributor_zip:
+        contributor_zip = contributor_zip.strip()
+
+    return (
+        _handle_two_year_transaction_period(two_year_transaction_period),
+        _handle_recipient_committee_type(recipient_committee_type),
+        _handle_location_query(contributor_zip, contributor_state, contributor_city),
+    )
+
+
 class DataFetcher:
     """
     Instantiated with the year and President/Senate/House level you're interested in
@@ -151,12 +239,16 @@ class DataFetcher:
             The one-letter type code of the office the political campaign was for
                 (H = House) (S = Senate) (P = Presidential).
 
+        rate_budget: RateBudget (optional)
+            Shared call budget from `src.data.batch_fetcher`, every API call waits on
+            `rate_budget.acquire()` instead of this fetcher counting its own calls.
+
     Returns:
         complete_list is returned after getting all transactions from a page.
 
     """
 
-    def __init__(self, two_year_transaction_period: int, recipient_committee_type: str, contributor_zip: str = None, contributor_state: str = None, contributor_city: str = None):
+    def __init__(self, two_year_transaction_period: int, recipient_committee_type: str, contributor_zip: str = None, contributor_state: str = None, contributor_city: str = None, rate_budget=None):
         self.api_starting_url_container = _make_api_url(
             two_year_transaction_period, recipient_committee_type, contributor_zip, contributor_state, contributor_city
         )
@@ -166,13 +258,18 @@ class DataFetcher:
         self.contributor_zip = contributor_zip
         self.contributor_state = contributor_state
         self.contributor_city = contributor_city
+        self.rate_budget = rate_budget
 
+        if self.rate_budget is not None:
+            self.rate_budget.acquire()
         self.total_pages = _get_total_pages_for_call(
             self.api_starting_url_container)
 
         self.starting_url = self.api_starting_url_container.url
 
         self.complete_list = []
+        # contributor_zip as the API sent it, one per row of complete_list, for matching zips by prefix like the API does
+        self.raw_contributor_zips = []
         self.df = None
 
         self.pages_pulled = 0
@@ -201,36 +298,68 @@ class DataFetcher:
         multiple pages, while keeping below the API call-per-hour threshold.
 
         Parameters:
-            sleep_timer: int (default=3600)
-                Time, in seconds, we wait when we hit the 1000 call limit
+            sleep_timer: int (default=0)
+                Time, in seconds, we wait when we hit our own per-minute call limit
+                (a 429 from the API waits its Retry-After or backs off instead)
 
             record_limit: int (optional)
                 Number of records to pull before exiting the run
         Result:
             You automagically have a DataFrame from the results of self.current_list
         """
+        fetch_started = time.perf_counter()
+        rows_before = len(self.complete_list)
+        pages_before = self.pages_pulled
+        rate_limited_in_a_row = 0
         while self.pages_pulled < self.total_pages:
             if record_limit:
                 if self.pages_pulled > record_limit:
                     break
             try:
-                if self.under_rate_limit:
-                    self.api_calls_per_min += 1
-
-                    self._get_next_page()
-                    self._get_transactions_on_page()
+                if self.rate_budget is not None:
+                    self.rate_budget.acquire()
+                    self._pull_page()
 
-                    self.pages_pulled += 1
+                elif self.under_rate_limit:
+                    self.api_calls_per_min += 1
+                    self._pull_page()
 
                 else:
-                    print(self.pages_pulled)
-                    #print("waiting 1 min")
+                    metrics.increment("fec_rate_limit_waits_total")
+                    metrics.increment("fec_rate_limit_wait_seconds_total", sleep_timer)
                     time.sleep(sleep_timer)
                     self.api_calls_per_min = 1
+                rate_limited_in_a_row = 0
+            except RateLimitedError as error:
+                # The API's own limit was hit, wait as long as it asks (or back off) and retry the page
+                rate_limited_in_a_row += 1
+                pause = _rate_limit_pause(error.retry_after, rate_limited_in_a_row)
+                metrics.increment("fec_rate_limit_waits_total")
+                metrics.increment("fec_rate_limit_wait_seconds_total", pause)
+                time.sleep(pause)
             except:
+                metrics.increment("fec_fetch_retries_total")
                 continue
         self._build_df()
 
+        elapsed = time.perf_counter() - fetch_started
+        metrics.observe("fec_fetch_seconds", elapsed)
+        if elapsed > 0:
+            metrics.set_gauge("fec_fetch_pages_per_second", (self.pages_pulled - pages_before) / elapsed)
+            metrics.set_gauge("fec_fetch_rows_per_second", (len(self.complete_list) - rows_before) / elapsed)
+
+    def _pull_page(self):
+        """
+        Gets the next page, adds its transactions to complete_list and counts it as pulled.
+        """
+        self._get_next_page()
+        with metrics.timer("fec_page_parse_seconds"):
+            self._get_transactions_on_page()
+
+        self.pages_pulled += 1
+        metrics.increment("fec_pages_pulled_total")
+        metrics.increment("fec_rows_pulled_total", len(self.info["results"]))
+
     def _get_next_page(self):
         """
         Adds two items to api_starting_url to get to the next page of transactions.
@@ -245,9 +374,7 @@ class DataFetcher:
         else:
             url = self.starting_url
 
-        uh = requests.get(url)
-        data = uh.text
-        self.info = json.loads(data)
+        self.info = _timed_get(url)
         self.last_index = self.info["pagination"]["last_indexes"]["last_index"]
         self.last_contribution_receipt_date = self.info["pagination"][
             "last_indexes"]["last_contribution_receipt_date"]
@@ -263,7 +390,7 @@ class DataFetcher:
 
         # Pull out the data we want from each transaction on a page and add it to the complete_list
         for item in self.info["results"]:
-            contributor_zip = item["contributor_zip"]
+            raw_contributor_zip = contributor_zip = item["contributor_zip"]
             try:
                 if contributor_zip.isnumeric():
                     if len(contributor_zip) < 5:
@@ -290,23 +417,13 @@ class DataFetcher:
                     party := item["committee"]["party"],
                 ]
             )
+            # Only once the row is in, so the two lists stay the same length when an item is malformed
+            self.raw_contributor_zips.append(raw_contributor_zip or "")
 
     def _build_df(self):
-        self.df = pd.DataFrame(
-            self.complete_list,
-            columns=[
-                "committee_name",
-                "contribution_receipt_amount",
-                "contributor_occupation",
-                "contributor_employer",
-                "contributor_street_1",
-                "contributor_street_2",
-                "contributor_city",
-                "contributor_state",
-                "contributor_zip",
-                "party",
-            ],
-        )
+        import pandas as pd
+
+        self.df = pd.DataFrame(self.complete_list, columns=COLUMNS)
         self.df.fillna(value="", inplace=True)
 
     def save_df_data(self):
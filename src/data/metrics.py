@@ -0,0 +1,208 @@
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+
+
+# Help text for every metric the fetch and clean pipelines report
+DESCRIPTIONS = {
+    "fec_api_requests_total": "FEC API requests made, by HTTP status",
+    "fec_api_request_seconds": "FEC API request latency in seconds",
+    "fec_json_parse_seconds": "Time spent decoding FEC API JSON responses",
+    "fec_page_parse_seconds": "Time spent turning one page of results into rows",
+    "fec_pages_pulled_total": "Result pages pulled from the FEC API",
+    "fec_rows_pulled_total": "Transactions pulled from the FEC API",
+    "fec_fetch_retries_total": "Pages retried after a failed request or unexpected response",
+    "fec_rate_limit_waits_total": "Times a fetch paused for the API rate limit, its own per-minute limit or a 429 response",
+    "fec_rate_limit_wait_seconds_total": "Seconds spent paused for the API rate limit",
+    "fec_fetch_seconds": "Wall time of a complete gimmie_data() run",
+    "fec_fetch_pages_per_second": "Pages per second of the last completed fetch",
+    "fec_fetch_rows_per_second": "Rows per second of the last completed fetch",
+    "fec_cache_requests_total": "Result cache lookups, by outcome",
+    "fec_cache_evictions_total": "Results evicted from the result cache to stay under its size bound",
+    "fec_tfidf_cache_requests_total": "TF-IDF artifact cache lookups, by outcome",
+    "fec_clean_stage_seconds": "Duration of each DataCleaner stage, by column",
+    "fec_clean_rows_per_second": "Rows per second of the last cleaning run, by column",
+    "fec_clean_unique_values": "Unique values in a column before and after cleaning",
+}
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((name, str(value)) for name, value in (labels or {}).items()))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(label_key: tuple, extra: tuple = ()) -> str:
+    pairs = label_key + extra
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class MetricsHook:
+    """
+    Receives every measurement the fetch and clean pipelines report.
+    Subclass it and override the methods you care about, then pass an instance to `add_hook()`
+    to forward metrics to a log, StatsD, a test, etc.
+
+    Methods:
+        increment(name, amount, labels): a counter went up by `amount`
+        observe(name, value, labels): one sample of a distribution, i.e. a duration in seconds
+        set_gauge(name, value, labels): a value that can go up and down, i.e. the last rows/sec
+    """
+
+    def increment(self, name: str, amount: float = 1, labels: dict = None):
+        pass
+
+    def observe(self, name: str, value: float, labels: dict = None):
+        pass
+
+    def set_gauge(self, name: str, value: float, labels: dict = None):
+        pass
+
+
+class MetricsRegistry(MetricsHook):
+    """
+    Hook that keeps counters, gauges and histograms in memory and renders them in the
+    Prometheus text exposition format. The module-level `registry` is always installed
+    and is what the web app's `/metrics` endpoint serves.
+    """
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counters = {}  # name -> {label_key: value}
+        self._gauges = {}
+        self._histograms = {}  # name -> {label_key: [bucket counts..., sum, count]}
+        self._lock = threading.Lock()
+
+    def increment(self, name, amount=1, labels=None):
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            key = _label_key(labels)
+            series[key] = series.get(key, 0) + amount
+
+    def set_gauge(self, name, value, labels=None):
+        with self._lock:
+            self._gauges.setdefault(name, {})[_label_key(labels)] = value
+
+    def observe(self, name, value, labels=None):
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            key = _label_key(labels)
+            state = series.get(key)
+            if state is None:
+                state = series[key] = [0] * len(self.buckets) + [0.0, 0]
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def value(self, name: str, labels: dict = None):
+        """
+        Current value of a counter or gauge, or the (sum, count) of a histogram. None if never reported.
+        """
+        key = _label_key(labels)
+        with self._lock:
+            for store in (self._counters, self._gauges):
+                if name in store and key in store[name]:
+                    return store[name][key]
+            if name in self._histograms and key in self._histograms[name]:
+                return tuple(self._histograms[name][key][-2:])
+        return None
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+    def _header(self, name: str, kind: str):
+        description = DESCRIPTIONS.get(name, name)
+        return [f"# HELP {name} {description}", f"# TYPE {name} {kind}"]
+
+    def render(self) -> str:
+        """
+        Returns every metric in the Prometheus text exposition format (version 0.0.4).
+        """
+        lines = []
+        with self._lock:
+            for name in sorted(self._counters):
+                lines.extend(self._header(name, "counter"))
+                for key, value in sorted(self._counters[name].items()):
+                    lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+            for name in sorted(self._gauges):
+                lines.extend(self._header(name, "gauge"))
+                for key, value in sorted(self._gauges[name].items()):
+                    lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+            for name in sorted(self._histograms):
+                lines.extend(self._header(name, "histogram"))
+                for key, state in sorted(self._histograms[name].items()):
+                    cumulative = 0
+                    for bound, count in zip(self.buckets, state[:-2]):
+                        cumulative += count
+                        lines.append(
+                            f"{name}_bucket{_format_labels(key, (('le', _format_value(bound)),))} {cumulative}")
+                    lines.append(f"{name}_bucket{_format_labels(key, (('le', '+Inf'),))} {state[-1]}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {_format_value(state[-2])}")
+                    lines.append(f"{name}_count{_format_labels(key)} {state[-1]}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+_hooks = [registry]
+
+
+def add_hook(hook: MetricsHook):
+    """
+    Sends every following measurement to `hook` as well as to the built-in registry.
+    """
+    if hook not in _hooks:
+        _hooks.append(hook)
+
+
+def remove_hook(hook: MetricsHook):
+    if hook is not registry and hook in _hooks:
+        _hooks.remove(hook)
+
+
+def increment(name: str, amount: float = 1, labels: dict = None):
+    for hook in _hooks:
+        hook.increment(name, amount, labels)
+
+
+def observe(name: str, value: float, labels: dict = None):
+    for hook in _hooks:
+        hook.observe(name, value, labels)
+
+
+def set_gauge(name: str, value: float, labels: dict = None):
+    for hook in _hooks:
+        hook.set_gauge(name, value, labels)
+
+
+@contextmanager
+def timer(name: str, labels: dict = None):
+    """
+    Observes the wall time, in seconds, of the `with` block as one sample of `name`.
+        with metrics.timer("fec_clean_stage_seconds", {"column": column, "stage": "vectorize"}):
+            ...
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, labels)
@@ -0,0 +1,230 @@
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from src.data import metrics
+
+
+class _InFlight:
+    """
+    Placeholder for a cache key that is currently being computed.
+    Other callers asking for the same key wait on `event` and then read
+    `value` (or re-raise `error`) instead of starting their own fetch.
+    """
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class ResultCache:
+    """
+    Thread-safe, in-process cache for query results with LRU eviction, a TTL
+    and single-flight request coalescing.
+
+    Parameters:
+        max_entries: int (default=128)
+            Number of results kept before the least recently used one is evicted.
+
+        ttl: float (default=900)
+            Seconds a result stays valid after it was stored.
+                i.e. 900 = a result is refetched 15 minutes after the first pull.
+
+    Usage:
+        cache = ResultCache(max_entries=64, ttl=600)
+        df = cache.get_or_compute(key, lambda: expensive_pull())
+            N threads calling this at once with the same `key` trigger a single
+            `expensive_pull()` and all receive its result.
+        df = await cache.get_or_compute_async(key, lambda: run_in_threadpool(expensive_pull))
+            The same for coroutines on one event loop, waiting without holding a thread.
+    """
+
+    def __init__(self, max_entries: int = 128, ttl: float = 900):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self.ttl = ttl
+
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._in_flight = {}  # key -> _InFlight
+        self._tasks = {}  # key -> asyncio.Task, the async get_or_compute_async() flights
+        self._lock = threading.Lock()
+        # Bumped by clear(), so computations started before it don't store their result
+        self._generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def __len__(self):
+        with self._lock:
+            self._purge_expired()
+            return len(self._entries)
+
+    def __contains__(self, key):
+        with self._lock:
+            return self._get_fresh(key) is not None
+
+    def _get_fresh(self, key):
+        """
+        Returns the (expires_at, value) entry for `key` if it exists and has not
+        expired, marking it as most recently used. Must be called with the lock held.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _purge_expired(self):
+        now = time.monotonic()
+        for key in [key for key, (expires_at, _) in self._entries.items() if expires_at <= now]:
+            del self._entries[key]
+
+    def _store(self, key, value):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+            metrics.increment("fec_cache_evictions_total")
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._get_fresh(key)
+            if entry is None:
+                self.misses += 1
+                metrics.increment("fec_cache_requests_total", labels={"result": "miss"})
+                return default
+            self.hits += 1
+            metrics.increment("fec_cache_requests_total", labels={"result": "hit"})
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._store(key, value)
+
+    def get_or_compute(self, key, compute):
+        """
+        Returns the cached value for `key`, calling `compute()` to produce it on a miss.
+
+        Only one `compute()` runs per key at a time, concurrent callers for the same key
+        block until it finishes and share its result. If `compute()` raises, every
+        waiting caller gets the same exception and nothing is cached. A result computed
+        across a clear() is handed to the waiting callers but not cached.
+        """
+        with self._lock:
+            entry = self._get_fresh(key)
+            if entry is not None:
+                self.hits += 1
+                metrics.increment("fec_cache_requests_total", labels={"result": "hit"})
+                return entry[1]
+            flight = self._in_flight.get(key)
+            if flight is None:
+                flight = self._in_flight[key] = _InFlight()
+                generation = self._generation
+                leader = True
+                self.misses += 1
+                metrics.increment("fec_cache_requests_total", labels={"result": "miss"})
+            else:
+                leader = False
+                self.coalesced += 1
+                metrics.increment("fec_cache_requests_total", labels={"result": "coalesced"})
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = compute()
+        except BaseException as error:
+            flight.error = error
+            raise
+        else:
+            with self._lock:
+                if generation == self._generation:
+                    self._store(key, flight.value)
+            return flight.value
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            flight.event.set()
+
+    async def get_or_compute_async(self, key, compute):
+        """
+        get_or_compute() for coroutines running on one event loop, with `compute` returning
+        an awaitable, i.e. lambda: run_in_threadpool(fetch).
+
+        Hits are answered on the loop and callers coalesced onto a computation already
+        running await it there, so only `compute()` itself may take a thread. Callers of
+        get_or_compute() and get_or_compute_async() don't share computations.
+        """
+        with self._lock:
+            entry = self._get_fresh(key)
+            if entry is not None:
+                self.hits += 1
+                metrics.increment("fec_cache_requests_total", labels={"result": "hit"})
+                return entry[1]
+            task = self._tasks.get(key)
+            if task is None:
+                task = self._tasks[key] = asyncio.ensure_future(self._compute_async(key, compute, self._generation))
+                self.misses += 1
+                metrics.increment("fec_cache_requests_total", labels={"result": "miss"})
+            else:
+                self.coalesced += 1
+                metrics.increment("fec_cache_requests_total", labels={"result": "coalesced"})
+
+        # A cancelled caller (i.e. a closed connection) leaves the computation running for the others
+        return await asyncio.shield(task)
+
+    async def _compute_async(self, key, compute, generation):
+        try:
+            value = await compute()
+            with self._lock:
+                if generation == self._generation:
+                    self._store(key, value)
+            return value
+        finally:
+            with self._lock:
+                del self._tasks[key]
+
+    def clear(self):
+        """
+        Drops every cached result. Computations already in flight still finish
+        and hand their result to their waiters, but don't cache it.
+        """
+        with self._lock:
+            cleared = len(self._entries)
+            self._entries.clear()
+            self._generation += 1
+        return cleared
+
+    def stats(self):
+        """
+        Returns a JSON-serializable summary of the cache's contents and counters.
+        """
+        with self._lock:
+            self._purge_expired()
+            now = time.monotonic()
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "in_flight": len(self._in_flight) + len(self._tasks),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "keys": [
+                    {"key": list(key) if isinstance(key, tuple) else key,
+                     "expires_in": round(expires_at - now, 1)}
+                    for key, (expires_at, _) in self._entries.items()
+                ],
+            }
@@ -0,0 +1,122 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+from src.data import metrics
+
+TFIDF_CACHE_DIR = "data/tfidf_cache"
+
+# Bump when _ngrams() or the stored layout changes so old artifacts are not reused
+CACHE_VERSION = "1"
+
+_ARRAYS = ["indptr", "indices", "data", "t_indptr", "t_indices", "t_data"]
+
+
+def content_hash(values, ngram_size: int) -> str:
+    """
+    Hashes the unique values of a column, in order, together with `ngram_size`.
+    The rows of the TF-IDF matrix follow the order of `values`, so the same values
+    in a different order get a different hash.
+    """
+    digest = hashlib.sha256(f"{CACHE_VERSION}|{ngram_size}|{len(values)}".encode())
+    for value in values:
+        digest.update(b"\x00")
+        digest.update(str(value).encode("utf-8", errors="surrogatepass"))
+    return digest.hexdigest()
+
+
+def _artifact_dir(cache_dir: str, column_name: str, key: str) -> str:
+    safe_column = "".join(char if char.isalnum() or char in "-_" else "_" for char in column_name) or "_"
+    return os.path.join(cache_dir, safe_column, key)
+
+
+def _load(path: str):
+    """
+    Memory-maps a stored artifact. Every process loading the same artifact shares the
+    same page-cache pages, and nothing is read from disk until the arrays are used.
+    """
+    import numpy as np
+    from scipy.sparse import csr_matrix
+
+    with open(os.path.join(path, "meta.json")) as f:
+        meta = json.load(f)
+    arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in _ARRAYS}
+    rows, columns = meta["shape"]
+    matrix = csr_matrix((arrays["data"], arrays["indices"], arrays["indptr"]), shape=(rows, columns), copy=False)
+    transposed = csr_matrix((arrays["t_data"], arrays["t_indices"], arrays["t_indptr"]), shape=(columns, rows), copy=False)
+    return matrix, transposed
+
+
+def _save(path: str, matrix, transposed):
+    """
+    Writes the artifact into a temporary directory next to `path` and renames it into
+    place, so concurrent workers never see a half-written artifact. If another worker
+    finished first its copy is kept.
+    """
+    import numpy as np
+
+    parent = os.path.dirname(path)
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(dir=parent, prefix=".tmp-")
+    try:
+        arrays = {
+            "indptr": matrix.indptr, "indices": matrix.indices, "data": matrix.data,
+            "t_indptr": transposed.indptr, "t_indices": transposed.indices, "t_data": transposed.data,
+        }
+        for name, array in arrays.items():
+            np.save(os.path.join(staging, f"{name}.npy"), np.ascontiguousarray(array))
+        with open(os.path.join(staging, "meta.json"), "w") as f:
+            json.dump({"shape": list(matrix.shape), "nnz": int(matrix.nnz), "version": CACHE_VERSION}, f)
+        os.rename(staging, path)
+    except OSError:
+        if not os.path.isdir(path):
+            raise
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def load_or_fit(values, analyzer, ngram_size: int, column_name: str = "", cache_dir: str = TFIDF_CACHE_DIR):
+    """
+    Returns the TF-IDF matrix of `values` and its transpose, both in CSR format, loading them
+    from `cache_dir` when this exact column content was vectorized before and fitting
+    `TfidfVectorizer(min_df=1, analyzer=analyzer)` (then saving the result) otherwise.
+
+    Parameters:
+        values: array-like
+            Unique column values, one matrix row per value.
+        analyzer: callable
+            Turns a value into its list of ngrams, i.e. DataCleaner._ngrams.
+        ngram_size: int
+            Size of the ngrams `analyzer` produces, part of the cache key.
+        column_name: str
+            Used to group artifacts on disk, i.e. data/tfidf_cache/contributor_employer/<hash>/
+        cache_dir: str (default="data/tfidf_cache")
+            Where artifacts are stored, None skips the cache entirely.
+
+    Returns:
+        (tf_idf_matrix, transposed): the matrix is len(values) x vocabulary size.
+    """
+    if cache_dir is not None:
+        path = _artifact_dir(cache_dir, column_name, content_hash(values, ngram_size))
+        if os.path.isfile(os.path.join(path, "meta.json")):
+            metrics.increment("fec_tfidf_cache_requests_total", labels={"result": "hit"})
+            return _load(path)
+        metrics.increment("fec_tfidf_cache_requests_total", labels={"result": "miss"})
+
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    vectorizer = TfidfVectorizer(min_df=1, analyzer=analyzer)
+    matrix = vectorizer.fit_transform(values).tocsr()
+    transposed = matrix.transpose().tocsr()
+
+    if cache_dir is not None:
+        _save(path, matrix, transposed)
+    return matrix, transposed
+
+
+def clear(cache_dir: str = TFIDF_CACHE_DIR):
+    """
+    Deletes every stored artifact.
+    """
+    shutil.rmtree(cache_dir, ignore_errors=True)
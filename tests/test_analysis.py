@@ -0,0 +1,175 @@
+import os
+import pytest
+import pandas as pd
+
+duckdb = pytest.importorskip("duckdb")
+
+from src.analysis.contributions import ContributionAnalysis, _quote_identifier
+
+
+RAW_NAMES = {
+    "IA": "3_of_3_for_A_in_2020_for_None_IA_None.csv",
+    "NE": "2_of_2_for_P_in_2018_for_None_NE_None.csv",
+}
+
+
+def _frame(party, employer, zip_code, amount):
+    return pd.DataFrame({
+        "committee_name": [f"{p} COMMITTEE" for p in party],
+        "contributor_employer": employer,
+        "contributor_zip": zip_code,
+        "party": party,
+        "contribution_receipt_amount": amount,
+    })
+
+
+@pytest.fixture
+def analysis(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data/raw_data")
+    os.makedirs("data/cleaned_data")
+    iowa = _frame(["DEM", "REP", "DEM", "REP"], ["ACME", "ACME INC", "ACME", "WIDGETS"],
+                  ["51106", "51106", "50010", "50010"], [10.0, 20.0, 30.0, 5.0])
+    nebraska = _frame(["REP", "DEM"], ["WIDGETS", "ACME"], ["68102", "68102"], [100.0, 1.0])
+    iowa.to_csv(f"data/raw_data/{RAW_NAMES['IA']}")
+    nebraska.to_csv(f"data/raw_data/{RAW_NAMES['NE']}")
+    cleaned = iowa.assign(contributor_employer=["ACME", "ACME", "ACME", "WIDGETS"])
+    cleaned.to_csv(f"data/cleaned_data/cleaned_0.8_{RAW_NAMES['IA']}")
+    iowa.to_csv(f"data/cleaned_data/cleaned_0.95_{RAW_NAMES['IA']}")
+    return ContributionAnalysis(threads=1)
+
+
+class TestFiles:
+    def test_prunes_on_file_name(self, analysis):
+        expected = [f"data/raw_data/{RAW_NAMES['IA']}"]
+        result = [os.path.relpath(path) for path in analysis.files("raw", period=2019, state="ia")]
+        assert expected == result
+
+    def test_committee_type_names(self, analysis):
+        expected = [f"data/raw_data/{RAW_NAMES['NE']}"]
+        result = [os.path.relpath(path) for path in analysis.files("raw", committee_type="presidential")]
+        assert expected == result
+
+    def test_similarity(self, analysis):
+        expected = [f"data/cleaned_data/cleaned_0.8_{RAW_NAMES['IA']}"]
+        result = [os.path.relpath(path) for path in analysis.files("cleaned", similarity=0.8)]
+        assert expected == result
+
+
+class TestTotalsBy:
+    def test_across_files(self, analysis):
+        expected = [("REP", 3, 125.0), ("DEM", 3, 41.0)]
+        result = list(analysis.totals_by_party().itertuples(index=False, name=None))
+        assert expected == result
+
+    def test_pruned_and_filtered(self, analysis):
+        expected = [("51106", 1, 20.0)]
+        result = analysis.totals_by_zip(state="IA", filters={"party": "REP", "contributor_zip": ["51106", "68102"]})
+        assert expected == list(result.itertuples(index=False, name=None))
+
+    def test_cleaned(self, analysis):
+        expected = [("ACME", 3, 60.0), ("WIDGETS", 1, 5.0)]
+        result = analysis.totals_by_employer(source="cleaned", similarity=0.8)
+        assert expected == list(result.itertuples(index=False, name=None))
+
+    def test_cleaned_needs_similarity(self, analysis):
+        with pytest.raises(ValueError):
+            analysis.totals_by_employer(source="cleaned")
+
+    def test_no_matching_files(self, analysis):
+        expected = ["party", "contributions", "total_amount"]
+        result = analysis.totals_by_party(period=2012)
+        assert result.empty
+        assert expected == list(result.columns)
+
+    def test_limit(self, analysis):
+        expected = ["REP COMMITTEE"]
+        result = analysis.totals_by_committee(limit=1)
+        assert expected == list(result["committee_name"])
+
+
+class TestRawVsCleaned:
+    def test_distinct_values_per_threshold(self, analysis):
+        expected = [(None, 4, 3), (0.95, 4, 3), (0.8, 4, 2)]
+        result = analysis.raw_vs_cleaned("contributor_employer", state="IA")
+        rows = [(None if pd.isna(similarity) else similarity, rows, distinct)
+                for similarity, rows, distinct in result[["similarity", "rows", "distinct_values"]].itertuples(index=False)]
+        assert expected == rows
+        assert result["distinct_reduction"].iloc[-1] == pytest.approx(1 / 3)
+
+
+class TestSql:
+    def test_views(self, analysis):
+        expected = 6
+        result = analysis.sql("SELECT count(*) AS n FROM raw")["n"].iloc[0]
+        assert expected == result
+
+    def test_identifiers_are_checked(self):
+        with pytest.raises(ValueError):
+            _quote_identifier('party" OR 1=1 --')
+
+
+class TestRows:
+    def test_rows(self, analysis):
+        expected = [("51106", "DEM")]
+        result = analysis.rows(["contributor_zip", "party"], filters={"contributor_zip": ["51106"], "party": "DEM"},
+                               source="cleaned", similarity=0.8)
+        assert expected == list(result.itertuples(index=False, name=None))
+
+    def test_files_without_typed_columns(self, tmp_path):
+        raw_dir = tmp_path / "raw"
+        raw_dir.mkdir()
+        test_csv = pd.read_csv(os.path.join(os.path.dirname(__file__), "test.csv"), index_col=0)
+        test_csv.drop(columns="contributor_zip").to_csv(raw_dir / RAW_NAMES["IA"])
+        analysis = ContributionAnalysis(str(raw_dir), str(tmp_path / "cleaned"), threads=1)
+
+        expected = len(test_csv)
+        result = analysis.rows(["party"])
+        assert expected == len(result)
+
+
+@pytest.fixture
+def saved_pulls(tmp_path, monkeypatch):
+    """
+    Overlapping pulls for 2020: a complete Iowa pull, a complete pull of zip 51106 and a
+    Nebraska pull cut off before its last page.
+    """
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data/raw_data")
+    iowa = _frame(["DEM", "DEM", "REP"], ["ACME", "ACME", "WIDGETS"], [51106, 51106, 50010], [10.0, 10.0, 5.0])
+    iowa.to_csv("data/raw_data/3_of_3_for_P_in_2020_for_None_IA_None.csv")
+    iowa[iowa["contributor_zip"] == 51106].to_csv("data/raw_data/1_of_1_for_P_in_2020_for_None_None_51106.csv")
+    nebraska = _frame(["REP"], ["WIDGETS"], [68102], [100.0])
+    nebraska.to_csv("data/raw_data/1_of_5_for_P_in_2020_for_None_NE_None.csv")
+    return ContributionAnalysis(threads=1)
+
+
+class TestFilesCovering:
+    def test_one_file_per_zip(self, saved_pulls):
+        expected = {"data/raw_data/3_of_3_for_P_in_2020_for_None_IA_None.csv": [51106, 50010]}
+        result = saved_pulls.files_covering({51106: "IA", 50010: "IA"}, 2020, "P")
+        assert expected == {os.path.relpath(path): zips for path, zips in result.items()}
+
+    def test_zip_pulls_cover_their_zips(self, saved_pulls):
+        expected = {"data/raw_data/1_of_1_for_P_in_2020_for_None_None_51106.csv": [51106]}
+        result = saved_pulls.files_covering({51106: None}, 2020, "P")
+        assert expected == {os.path.relpath(path): zips for path, zips in result.items()}
+
+    def test_incomplete_and_other_queries(self, saved_pulls):
+        assert saved_pulls.files_covering({68102: "NE"}, 2020, "P") == {}
+        assert saved_pulls.files_covering({51106: "IA"}, 2020, "H") == {}
+        assert saved_pulls.files_covering({51106: "IA"}, 2016, "P") == {}
+
+
+class TestRowsByFile:
+    def test_overlapping_pulls_read_once(self, saved_pulls):
+        expected = [(51106, 10.0), (51106, 10.0)]
+        result = saved_pulls.rows_by_file(["contributor_zip", "contribution_receipt_amount"],
+                                          saved_pulls.files_covering({51106: "IA"}, 2020, "P"))
+        assert expected == [(int(zip_code), amount) for zip_code, amount in result.itertuples(index=False, name=None)]
+
+    def test_no_files(self, saved_pulls):
+        expected = ["party"]
+        result = saved_pulls.rows_by_file(["party"], {})
+        assert result.empty
+        assert expected == list(result.columns)
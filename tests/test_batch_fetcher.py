@@ -0,0 +1,121 @@
+from src.data.batch_fetcher import BatchFetcher, QuerySpec, RateBudget, plan_queries
+from src.data.data_fetcher import DataFetcher
+from benchmarks.fec_api_stub import FECStubServer
+from benchmarks.synthetic import make_transactions
+import pytest
+import time
+
+
+class TestPlanQueries:
+    def test_merges_duplicates(self):
+        specs = [QuerySpec("2020", "P", None, "IA"), QuerySpec("2019", "presidential", None, "ia")]
+
+        result = plan_queries(specs)
+        assert len(result) == 1
+        assert result[0].members == specs
+
+    def test_merges_subsumed(self):
+        state = QuerySpec("2020", "A", None, "IA")
+        city = QuerySpec("2020", "A", None, "IA", "Sioux City")
+        zip_code = QuerySpec("2020", "A", "51106", "IA", "Sioux City")
+
+        result = plan_queries([zip_code, city, state])
+        assert len(result) == 1
+        assert result[0].spec == state
+        assert set(result[0].members) == {state, city, zip_code}
+
+    def test_keeps_unrelated(self):
+        specs = [
+            QuerySpec("2020", "A", None, "IA"),
+            QuerySpec("2020", "A", None, "NE"),
+            QuerySpec("2018", "A", None, "IA", "Sioux City"),
+            QuerySpec("2020", "H", None, "IA", "Sioux City"),
+            QuerySpec("2020", "A", "51106"),  # no state given, can't assume it's in IA
+        ]
+
+        result = plan_queries(specs)
+        assert len(result) == 5
+
+    def test_no_subsumption(self):
+        specs = [QuerySpec("2020", "A", None, "IA"), QuerySpec("2020", "A", None, "IA", "Sioux City")]
+
+        result = plan_queries(specs, merge_subsumed=False)
+        assert len(result) == 2
+
+
+class TestRateBudget:
+    def test_blocks_when_spent(self):
+        budget = RateBudget(calls_per_window=2, window=0.2)
+        start = time.monotonic()
+        for _ in range(3):
+            budget.acquire()
+        assert time.monotonic() - start >= 0.15
+
+
+class TestBatchFetcher:
+    @pytest.fixture
+    def server(self, monkeypatch):
+        monkeypatch.setenv("FEC_API_KEY", "DEMO_KEY")
+        server = FECStubServer(make_transactions(600)).start()
+        monkeypatch.setenv("FEC_API_BASE_URL", server.base_url)
+        yield server
+        server.stop()
+
+    def test_split_matches_direct_pulls(self, server):
+        specs = [
+            QuerySpec("2020", "A", None, "IA"),
+            QuerySpec("2020", "A", None, "IA", "Sioux City"),
+            QuerySpec("2020", "A", "51106", "IA", "Sioux City"),
+            QuerySpec("2020", "A", None, "NE"),
+            QuerySpec("2020", "A", None, "NE"),
+        ]
+
+        batch = BatchFetcher(specs, max_workers=2)
+        results = batch.run()
+        batch_requests = server.requests_served
+        assert len(batch.plan) == 2
+
+        for spec in specs:
+            fetcher = DataFetcher(*spec)
+            fetcher.gimmie_data()
+            expected = fetcher.df
+            assert len(results[spec]) == len(expected)
+            assert results[spec].reset_index(drop=True).equals(expected)
+        assert batch_requests < server.requests_served - batch_requests
+
+    def test_split_matches_zip_prefixes(self, monkeypatch):
+        transactions = make_transactions(300)
+        for i, transaction in enumerate(transactions):
+            transaction["contributor_state"] = "IA"
+            transaction["contributor_zip"] = ["51106", "511061234", "51106-1234", "51105", "51054"][i % 5]
+        monkeypatch.setenv("FEC_API_KEY", "DEMO_KEY")
+        with FECStubServer(transactions) as server:
+            monkeypatch.setenv("FEC_API_BASE_URL", server.base_url)
+            specs = [
+                QuerySpec("2020", "A", None, "IA"),
+                QuerySpec("2020", "A", "5110", "IA"),
+                QuerySpec("2020", "A", "51106", "IA"),
+            ]
+
+            batch = BatchFetcher(specs)
+            results = batch.run()
+            assert len(batch.plan) == 1
+
+            for spec in specs:
+                fetcher = DataFetcher(*spec)
+                fetcher.gimmie_data()
+                expected = fetcher.df
+                assert len(results[spec]) == len(expected)
+                assert results[spec].reset_index(drop=True).equals(expected)
+
+    def test_save_results(self, server, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "data" / "raw_data").mkdir(parents=True)
+        specs = [QuerySpec("2020", "A", None, "IA"), QuerySpec("2020", "A", None, "IA", "Sioux City")]
+
+        batch = BatchFetcher(specs)
+        batch.save_results(batch.run())
+        result = sorted(path.name for path in (tmp_path / "data" / "raw_data").iterdir())
+        assert len(result) == 2
+        assert result[0].endswith("_for_A_in_2020_for_None_IA_None.csv")
+        assert result[1].endswith("_for_A_in_2020_for_Sioux City_IA_None.csv")
@@ -89,4 +89,43 @@ class TestGetMatchesDf:
         name_vector = [0,0,0]
         
         result = testing[0]._get_matches_df(sparse_matrix, name_vector)
-        assert len(result["left_side"]) == len(result["right_side"])
\ No newline at end of file
+        assert len(result["left_side"]) == len(result["right_side"])
+
+class TestGetMatchesCodes:
+    def test_codes_align_with_similarity(self):
+        sparse_matrix = csr_matrix(np.array([[1.0, 0.9, 0], [0.9, 1.0, 0], [0, 0, 1.0]]))
+
+        left, right, similarity = testing[0]._get_matches_codes(sparse_matrix)
+        assert list(left) == [0, 0, 1, 1, 2]
+        assert list(right) == [0, 1, 0, 1, 2]
+        assert list(similarity) == [1.0, 0.9, 0.9, 1.0, 1.0]
+
+
+class TestMergeCategories:
+    def test_larger_count_wins(self):
+        expected = [0, 0, 2]
+
+        result = testing[0]._merge_categories(np.array([0, 1]), np.array([1, 0]), [5, 2, 1])
+        assert expected == result
+
+    def test_moved_rows_follow_later_merges(self):
+        # 2 -> 1 first, then 1 (now holding 2's rows too) -> 0
+        expected = [0, 0, 0]
+
+        result = testing[0]._merge_categories(np.array([1, 0]), np.array([2, 1]), [10, 3, 2])
+        assert expected == result
+
+    def test_merged_away_value_is_skipped(self):
+        # Once 2 has been merged into 0 no row holds it, so it can't absorb 1
+        expected = [0, 1, 0]
+
+        result = testing[0]._merge_categories(np.array([0, 2]), np.array([2, 1]), [5, 1, 3])
+        assert expected == result
+
+
+class TestReplaceMatchesDf:
+    def test_rewrites_categories_only(self):
+        df = pd.DataFrame({"contributor_employer": ["NOT EMPLOYED"] * 3 + ["NOT EMPLOYEED", "APPLE"]})
+
+        result = DataCleaner(df, 0.8, "contributor_employer", 3, None)._replace_matches_df()
+        assert list(result["contributor_employer"]) == ["NOT EMPLOYED"] * 4 + ["APPLE"]
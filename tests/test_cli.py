@@ -0,0 +1,72 @@
+from src.cli import main, list_datasets
+from src.data import tfidf_cache
+import subprocess
+import sys
+import pytest
+import os
+
+
+class TestStartup:
+    def test_help_skips_heavy_imports(self):
+        code = (
+            "import sys\n"
+            "from src.cli import main\n"
+            "try:\n"
+            "    main(['--help'])\n"
+            "except SystemExit:\n"
+            "    pass\n"
+            "heavy = [name for name in ('pandas', 'numpy', 'sklearn', 'scipy', 'ftfy', 'requests') if name in sys.modules]\n"
+            "print(heavy)\n"
+        )
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        assert result.stdout.strip().endswith("[]")
+
+    def test_modules_import_lazily(self):
+        code = (
+            "import sys\n"
+            "import src.data.clean_data, src.data.data_fetcher\n"
+            "print([name for name in ('pandas', 'sklearn', 'scipy', 'ftfy') if name in sys.modules])\n"
+        )
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        assert result.stdout.strip() == "[]"
+
+
+class TestList:
+    @pytest.fixture
+    def data_dirs(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        os.makedirs("data/raw_data")
+        os.makedirs("data/cleaned_data")
+        raw_name = "12_of_40_for_A_in_2020_for_Sioux City_IA_51106.csv"
+        for path in [f"data/raw_data/{raw_name}", f"data/cleaned_data/cleaned_0.9_{raw_name}"]:
+            with open(path, "w") as f:
+                f.write(",party\n0,DEM\n1,REP\n")
+        return raw_name
+
+    def test_raw(self, data_dirs):
+        result = list_datasets("raw")
+        assert len(result) == 1
+        assert result[0]["rows"] == 2
+        assert result[0]["state"] == "IA"
+        assert result[0]["city"] == "Sioux City"
+        assert result[0]["zip"] == "51106"
+
+    def test_cleaned(self, data_dirs):
+        result = list_datasets("cleaned")
+        assert result[0]["similarity"] == 0.9
+        assert result[0]["period"] == "2020"
+
+    def test_list_command(self, data_dirs, capsys):
+        assert main(["list"]) == 0
+        captured = capsys.readouterr().out
+        assert data_dirs in captured
+
+
+class TestClean:
+    def test_clear_tfidf_cache(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        os.makedirs("data/raw_data")
+        os.makedirs(os.path.join(tfidf_cache.TFIDF_CACHE_DIR, "stale"))
+
+        assert main(["clean", "--clear-tfidf-cache"]) == 0
+        assert not os.path.exists(tfidf_cache.TFIDF_CACHE_DIR)
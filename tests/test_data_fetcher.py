@@ -1,7 +1,95 @@
-from src.data.data_fetcher import DataFetcher
+from src.data.data_fetcher import COLUMNS, DataFetcher, _rate_limit_pause
+from src.data import data_fetcher, metrics
+from benchmarks.fec_api_stub import FECStubServer
+from benchmarks.synthetic import make_transactions
 import pytest
 import os
 
 
+@pytest.fixture
+def stub_api(monkeypatch):
+    """
+    Points DataFetcher at a local stand-in of the FEC API serving 250 transactions.
+    """
+    monkeypatch.setenv("FEC_API_KEY", "DEMO_KEY")
+    servers = []
+
+    def start(transactions=None, **kwargs):
+        server = FECStubServer(transactions or make_transactions(250), **kwargs).start()
+        servers.append(server)
+        monkeypatch.setenv("FEC_API_BASE_URL", server.base_url)
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
 class TestDataFetcher:
-    pass
\ No newline at end of file
+    def test_total_pages(self, stub_api):
+        stub_api()
+        expected = 3
+
+        result = DataFetcher("2020", "P").total_pages
+        assert expected == result
+
+    def test_pulls_every_page(self, stub_api):
+        transactions = make_transactions(250)
+        stub_api(transactions)
+
+        fetcher = DataFetcher("2020", "P")
+        fetcher.gimmie_data()
+        assert fetcher.pages_pulled == 3
+        assert len(fetcher.df) == 250
+        assert list(fetcher.df["contributor_employer"]) == [item["contributor_employer"] for item in transactions]
+
+    def test_zip_normalization(self, stub_api):
+        transactions = make_transactions(3)
+        transactions[0]["contributor_zip"] = "511061234"
+        transactions[1]["contributor_zip"] = "511"
+        transactions[2]["contributor_zip"] = None
+        stub_api(transactions)
+        expected = [51106, 99999, 99999]
+
+        fetcher = DataFetcher("2020", "P")
+        fetcher.gimmie_data()
+        result = list(fetcher.df["contributor_zip"])
+        assert expected == result
+
+    def test_malformed_item_keeps_raw_zips_aligned(self, stub_api):
+        transactions = make_transactions(250)
+        transactions[120]["committee"] = None
+        stub_api(transactions)
+
+        fetcher = DataFetcher("2020", "P")
+        fetcher.gimmie_data()
+        assert len(fetcher.raw_contributor_zips) == len(fetcher.complete_list)
+        for raw_zip, row in zip(fetcher.raw_contributor_zips, fetcher.complete_list):
+            if raw_zip.isnumeric() and len(raw_zip) >= 5:
+                assert int(raw_zip[:5]) == row[COLUMNS.index("contributor_zip")]
+
+    def test_recovers_from_rate_limit(self, stub_api, monkeypatch):
+        monkeypatch.setattr(data_fetcher, "RATE_LIMIT_BACKOFF", 0.05)
+        server = stub_api(rate_limit=2, rate_window=0.2)
+        waits_before = metrics.registry.value("fec_rate_limit_waits_total") or 0
+
+        fetcher = DataFetcher("2020", "P")
+        fetcher.gimmie_data()
+        assert len(fetcher.df) == 250
+        assert server.rate_limited > 0
+        assert metrics.registry.value("fec_rate_limit_waits_total") - waits_before == server.rate_limited
+
+    def test_rate_limit_backoff(self):
+        expected = [1, 2, 4, 60, 5]
+        result = [_rate_limit_pause(None, 1), _rate_limit_pause(None, 2), _rate_limit_pause(None, 3),
+                  _rate_limit_pause(None, 20), _rate_limit_pause(5, 3)]
+        assert expected == result
+
+    def test_reports_metrics(self, stub_api):
+        stub_api()
+        before = metrics.registry.value("fec_rows_pulled_total") or 0
+
+        DataFetcher("2020", "P").gimmie_data()
+        result = metrics.registry.value("fec_rows_pulled_total") - before
+        assert result == 250
+        assert metrics.registry.value("fec_api_requests_total", {"status": 200}) >= 4
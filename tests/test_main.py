@@ -0,0 +1,177 @@
+from fastapi.responses import HTMLResponse
+from fastapi.testclient import TestClient
+from benchmarks.fec_api_stub import FECStubServer
+from benchmarks.synthetic import make_transactions
+import main
+import pytest
+import threading
+import time
+import os
+
+
+CENTROIDS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "geo", "zip_centroids.csv")
+
+
+FORM = {
+    "election_year": "2020",
+    "election_type": "P",
+    "ship_address": "1 Main St",
+    "locality": "Sioux City",
+    "state": "IA",
+    "postcode": "51106",
+    "country": "US",
+}
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """
+    A client of the web app pulling from a local stand-in of the FEC API, with an empty
+    result cache, data/raw_data in a temporary directory and the bundled ZIP centroids.
+    Yields the client, the server and the context of every rendered page.
+    """
+    transactions = make_transactions(250)
+    for transaction in transactions:
+        transaction["contributor_state"] = "IA"
+    server = FECStubServer(transactions).start()
+    monkeypatch.setenv("FEC_API_BASE_URL", server.base_url)
+    monkeypatch.setenv("FEC_API_KEY", "DEMO_KEY")
+    monkeypatch.setenv("FEC_ZIP_CENTROIDS", CENTROIDS)
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data/raw_data")
+    # Only the pulls are under test, the page itself is rendered by the installed Starlette's templates
+    rendered = []
+
+    def render(name, context):
+        rendered.append(context)
+        return HTMLResponse("ok")
+
+    monkeypatch.setattr(main.templates, "TemplateResponse", render)
+    main.result_cache.clear()
+    get_zip_index = main.get_zip_index
+    get_zip_index.cache_clear()
+
+    yield TestClient(main.app), server, rendered
+    server.stop()
+    main.result_cache.clear()
+    get_zip_index.cache_clear()
+
+
+def _save_pull(name, zip_codes, amount="10.0"):
+    with open(f"data/raw_data/{name}", "w") as f:
+        f.write("," + ",".join(main.COLUMNS) + "\n")
+        for row, zip_code in enumerate(zip_codes):
+            values = {"contribution_receipt_amount": amount, "contributor_state": "IA", "contributor_zip": zip_code}
+            f.write(f"{row}," + ",".join(values.get(column, "x") for column in main.COLUMNS) + "\n")
+
+
+class TestResultCache:
+    @pytest.fixture(autouse=True)
+    def no_zip_index(self, client, monkeypatch):
+        monkeypatch.setattr(main, "get_zip_index", lambda: None)
+
+    def test_identical_posts_share_one_pull(self, client):
+        client, server, _ = client
+        before = client.get("/cache").json()
+        assert client.post("/generic", data=FORM).status_code == 200
+        served = server.requests_served
+
+        assert client.post("/generic", data=FORM).status_code == 200
+        assert server.requests_served == served
+        after = client.get("/cache").json()
+        assert after["hits"] - before["hits"] == 1
+        assert after["misses"] - before["misses"] == 1
+
+    def test_delete_empties_the_cache(self, client):
+        client, server, _ = client
+        client.post("/generic", data=FORM)
+        served = server.requests_served
+
+        expected = {"cleared": 1}
+        result = client.delete("/cache").json()
+        assert expected == result
+        assert len(main.result_cache) == 0
+
+        client.post("/generic", data=FORM)
+        assert server.requests_served > served
+
+    def test_waiting_posts_hold_no_threads(self, client, monkeypatch):
+        # More identical posts than the 40 threads Starlette runs blocking calls on
+        release = threading.Event()
+
+        class SlowIowa:
+            def __init__(self, year, committee_type, zip_code, state, city):
+                self.state = state
+                self.df = None
+                self.pages_pulled = self.total_pages = 1
+
+            def gimmie_data(self, record_limit=None):
+                if self.state == "IA":
+                    release.wait(30)
+
+            def save_df_data(self):
+                pass
+
+        monkeypatch.setattr(main, "DataFetcher", SlowIowa)
+        with TestClient(main.app) as client:
+            waiting = [threading.Thread(target=client.post, args=("/generic",), kwargs={"data": FORM}) for _ in range(50)]
+            for thread in waiting:
+                thread.start()
+            # At least as many as there are threads are waiting on the Iowa pull
+            deadline = time.monotonic() + 10
+            while main.result_cache.coalesced < 39 and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+            other = threading.Thread(target=client.post, args=("/generic",), kwargs={"data": {**FORM, "state": "NE"}})
+            other.start()
+            other.join(5)
+            finished = not other.is_alive()
+            release.set()
+            for thread in waiting:
+                thread.join()
+        assert finished
+
+
+class TestNearby:
+    def test_index_built_on_first_search(self, client):
+        client, _, rendered = client
+        assert main.get_zip_index.cache_info().currsize == 0
+
+        assert client.post("/generic", data=FORM).status_code == 200
+        assert main.get_zip_index.cache_info().currsize == 1
+        assert rendered[-1]["nearby"] is not None
+
+    def test_answered_from_complete_saved_pulls(self, client):
+        client, server, rendered = client
+        _save_pull("1_of_1_for_P_in_2020_for_None_IA_None.csv", ["51106", "51106", "50309"])
+        _save_pull("1_of_1_for_P_in_2020_for_None_None_51106.csv", ["51106", "51106"])
+        _save_pull("1_of_1_for_P_in_2020_for_None_NE_None.csv", [])
+
+        assert client.post("/generic", data=FORM).status_code == 200
+        assert server.requests_served == 0
+        expected = ["51106", "51106"]
+        assert expected == list(rendered[-1]["nearby"]["contributor_zip"])
+        assert not rendered[-1]["nearby_partial"]
+
+    def test_incomplete_saved_pull_is_pulled_again(self, client):
+        client, server, rendered = client
+        _save_pull("1_of_9_for_P_in_2020_for_None_IA_None.csv", ["51106"])
+        _save_pull("1_of_1_for_P_in_2020_for_None_NE_None.csv", [])
+
+        assert client.post("/generic", data=FORM).status_code == 200
+        assert server.requests_served > 0
+
+    def test_unreadable_saved_pull_falls_back(self, client):
+        client, server, rendered = client
+        _save_pull("1_of_1_for_P_in_2020_for_None_IA_None.csv", ["51106"], amount="lots")
+        _save_pull("1_of_1_for_P_in_2020_for_None_NE_None.csv", [])
+
+        assert client.post("/generic", data=FORM).status_code == 200
+        assert server.requests_served > 0
+        assert rendered[-1]["nearby"] is not None
+
+    def test_radius_outside_the_pulled_state_is_partial(self, client):
+        # 68731 (Dakota City, NE) is within 10 miles of 51106 but the app only pulls Iowa
+        client, _, rendered = client
+        assert client.post("/generic", data=FORM).status_code == 200
+        assert rendered[-1]["nearby_partial"]
@@ -0,0 +1,66 @@
+from src.data import metrics
+from src.data.metrics import MetricsHook, MetricsRegistry
+import pytest
+
+
+class RecordingHook(MetricsHook):
+    def __init__(self):
+        self.events = []
+
+    def increment(self, name, amount=1, labels=None):
+        self.events.append(("increment", name, amount, labels))
+
+    def observe(self, name, value, labels=None):
+        self.events.append(("observe", name, value, labels))
+
+
+class TestMetricsRegistry:
+    def test_counter_render(self):
+        registry = MetricsRegistry()
+        registry.increment("fec_api_requests_total", labels={"status": 200})
+        registry.increment("fec_api_requests_total", 2, labels={"status": 200})
+        registry.increment("fec_api_requests_total", labels={"status": 429})
+
+        result = registry.render()
+        assert "# TYPE fec_api_requests_total counter" in result
+        assert 'fec_api_requests_total{status="200"} 3' in result
+        assert 'fec_api_requests_total{status="429"} 1' in result
+
+    def test_histogram_buckets(self):
+        registry = MetricsRegistry(buckets=(0.1, 1))
+        registry.observe("fec_api_request_seconds", 0.05)
+        registry.observe("fec_api_request_seconds", 0.5)
+        registry.observe("fec_api_request_seconds", 5)
+
+        result = registry.render().splitlines()
+        assert 'fec_api_request_seconds_bucket{le="0.1"} 1' in result
+        assert 'fec_api_request_seconds_bucket{le="1"} 2' in result
+        assert 'fec_api_request_seconds_bucket{le="+Inf"} 3' in result
+        assert "fec_api_request_seconds_sum 5.55" in result
+        assert "fec_api_request_seconds_count 3" in result
+
+    def test_label_escaping(self):
+        registry = MetricsRegistry()
+        registry.set_gauge("fec_clean_unique_values", 4, {"column": 'a "b"\\c'})
+
+        result = registry.render()
+        assert 'fec_clean_unique_values{column="a \\"b\\"\\\\c"} 4' in result
+
+
+class TestHooks:
+    def test_hook_receives_events(self):
+        hook = RecordingHook()
+        metrics.add_hook(hook)
+        try:
+            metrics.increment("fec_pages_pulled_total")
+            with metrics.timer("fec_fetch_seconds"):
+                pass
+        finally:
+            metrics.remove_hook(hook)
+
+        assert hook.events[0] == ("increment", "fec_pages_pulled_total", 1, None)
+        assert hook.events[1][:2] == ("observe", "fec_fetch_seconds")
+
+    def test_registry_cannot_be_removed(self):
+        metrics.remove_hook(metrics.registry)
+        assert metrics.registry in metrics._hooks
@@ -0,0 +1,162 @@
+from src.data.result_cache import ResultCache
+import asyncio
+import threading
+import time
+import pytest
+
+
+class TestResultCache:
+    def test_hit_after_miss(self):
+        cache = ResultCache()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return "data"
+
+        assert cache.get_or_compute("key", compute) == "data"
+        assert cache.get_or_compute("key", compute) == "data"
+        assert len(calls) == 1
+        assert cache.hits == 1
+        assert cache.misses == 1
+
+    def test_get_counts_hits_and_misses(self):
+        cache = ResultCache()
+        assert cache.get("key") is None
+        cache.set("key", "data")
+        assert cache.get("key") == "data"
+
+        assert cache.hits == 1
+        assert cache.misses == 1
+
+    def test_lru_eviction(self):
+        cache = ResultCache(max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")  # "b" is now the least recently used
+        cache.set("c", 3)
+
+        assert "a" in cache
+        assert "b" not in cache
+        assert "c" in cache
+        assert cache.evictions == 1
+
+    def test_ttl_expiry(self):
+        cache = ResultCache(ttl=0.05)
+        cache.set("key", "data")
+        assert cache.get("key") == "data"
+
+        time.sleep(0.1)
+        assert cache.get("key") is None
+        assert len(cache) == 0
+
+    def test_coalesces_concurrent_requests(self):
+        cache = ResultCache()
+        calls = []
+        release = threading.Event()
+
+        def compute():
+            calls.append(1)
+            release.wait(5)
+            return "data"
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.get_or_compute("key", compute)))
+            for _ in range(10)
+        ]
+        for thread in threads:
+            thread.start()
+        while cache.misses + cache.coalesced < 10:
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        assert len(calls) == 1
+        assert results == ["data"] * 10
+        assert cache.coalesced == 9
+
+    def test_error_not_cached(self):
+        cache = ResultCache()
+
+        def compute():
+            raise RuntimeError("API down")
+
+        with pytest.raises(RuntimeError):
+            cache.get_or_compute("key", compute)
+        assert "key" not in cache
+        assert cache.get_or_compute("key", lambda: "data") == "data"
+
+    def test_clear(self):
+        cache = ResultCache()
+        cache.set("a", 1)
+        cache.set("b", 2)
+
+        assert cache.clear() == 2
+        assert cache.stats()["entries"] == 0
+
+    def test_clear_during_compute(self):
+        cache = ResultCache()
+        started = threading.Event()
+        release = threading.Event()
+
+        def compute():
+            started.set()
+            release.wait(5)
+            return "stale"
+
+        results = []
+        thread = threading.Thread(target=lambda: results.append(cache.get_or_compute("key", compute)))
+        thread.start()
+        started.wait(5)
+        cache.clear()
+        release.set()
+        thread.join()
+
+        assert results == ["stale"]
+        assert "key" not in cache
+
+    def test_async_coalesces_on_the_loop(self):
+        cache = ResultCache()
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "data"
+
+        async def run():
+            return await asyncio.gather(*[cache.get_or_compute_async("key", compute) for _ in range(10)])
+
+        assert asyncio.run(run()) == ["data"] * 10
+        assert len(calls) == 1
+        assert cache.coalesced == 9
+        assert cache.get("key") == "data"
+
+    def test_async_clear_during_compute(self):
+        cache = ResultCache()
+
+        async def compute():
+            await asyncio.sleep(0.05)
+            return "stale"
+
+        async def run():
+            pending = asyncio.ensure_future(cache.get_or_compute_async("key", compute))
+            await asyncio.sleep(0)
+            cache.clear()
+            return await pending
+
+        assert asyncio.run(run()) == "stale"
+        assert "key" not in cache
+
+    def test_async_error_not_cached(self):
+        cache = ResultCache()
+
+        async def compute():
+            raise RuntimeError("API down")
+
+        with pytest.raises(RuntimeError):
+            asyncio.run(cache.get_or_compute_async("key", compute))
+        assert "key" not in cache
+        assert cache.stats()["in_flight"] == 0
@@ -0,0 +1,56 @@
+from src.data import tfidf_cache
+from src.data.clean_data import DataCleaner
+import numpy as np
+import pandas as pd
+import pytest
+import os
+
+test_df = pd.read_csv("tests/test.csv", index_col = 0)
+test_df.fillna(value="", inplace=True)
+
+
+@pytest.fixture
+def cleaner():
+    return DataCleaner(test_df.copy(), 0.8, "contributor_employer", 3)
+
+
+class TestTfidfCache:
+    def test_hit_matches_fit(self, cleaner, tmp_path):
+        values = test_df["contributor_employer"].unique()
+
+        fitted, fitted_t = tfidf_cache.load_or_fit(values, cleaner._ngrams, 3, "contributor_employer", str(tmp_path))
+        loaded, loaded_t = tfidf_cache.load_or_fit(values, cleaner._ngrams, 3, "contributor_employer", str(tmp_path))
+        assert not loaded.data.flags.writeable  # a view of the read-only memory map, not a copy
+        assert (fitted != loaded).nnz == 0
+        assert (fitted_t != loaded_t).nnz == 0
+        assert (loaded.transpose() != loaded_t).nnz == 0
+
+    def test_key_depends_on_order_and_ngram_size(self):
+        values = ["APPLE", "APPLE INC"]
+
+        assert tfidf_cache.content_hash(values, 3) == tfidf_cache.content_hash(list(values), 3)
+        assert tfidf_cache.content_hash(values, 3) != tfidf_cache.content_hash(values[::-1], 3)
+        assert tfidf_cache.content_hash(values, 3) != tfidf_cache.content_hash(values, 2)
+
+    def test_disabled(self, cleaner, tmp_path, monkeypatch):
+        values = test_df["contributor_employer"].unique()
+        monkeypatch.chdir(tmp_path)
+
+        tfidf_cache.load_or_fit(values, cleaner._ngrams, 3, "contributor_employer", None)
+        assert not os.path.exists(tfidf_cache.TFIDF_CACHE_DIR)
+
+    def test_artifact_files(self, cleaner, tmp_path):
+        values = test_df["contributor_employer"].unique()
+        expected = sorted([f"{name}.npy" for name in tfidf_cache._ARRAYS] + ["meta.json"])
+
+        tfidf_cache.load_or_fit(values, cleaner._ngrams, 3, "contributor_employer", str(tmp_path))
+        (artifact,) = os.listdir(tmp_path / "contributor_employer")
+        result = sorted(os.listdir(tmp_path / "contributor_employer" / artifact))
+        assert expected == result
+
+    def test_cleaning_unchanged(self, tmp_path):
+        expected = DataCleaner(test_df.copy(), 0.8, "contributor_employer", 3, None)._replace_matches_df()
+
+        for _ in range(2):  # first run fills the cache, second reads from it
+            result = DataCleaner(test_df.copy(), 0.8, "contributor_employer", 3, str(tmp_path))._replace_matches_df()
+            assert expected.equals(result)
@@ -0,0 +1,98 @@
+from src.analysis.zip_index import ZipIndex, load_zip_index, normalize_zip, read_centroids
+import pandas as pd
+import pytest
+import os
+
+
+BUNDLED = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "geo", "zip_centroids.csv")
+
+
+# Approximate centroids, enough to check distances and ordering
+CENTROIDS = [
+    ("51106", 42.467, -96.350),
+    ("51105", 42.510, -96.390),
+    ("51054", 42.384, -96.320),
+    ("68102", 41.260, -95.930),
+    ("02134", 42.356, -71.130),
+]
+
+
+@pytest.fixture
+def index():
+    zips, latitudes, longitudes = zip(*CENTROIDS)
+    return ZipIndex([normalize_zip(zip_code) for zip_code in zips], latitudes, longitudes)
+
+
+class TestNormalizeZip:
+    def test_matches_saved_zips(self):
+        expected = [2134, 2134, 2134, 2134, 51106]
+        result = [normalize_zip(value) for value in ["02134", "02134-1234", "021341234", 2134, "51106.0"]]
+        assert expected == result
+
+    def test_unreadable(self):
+        expected = [None, None, None]
+        result = [normalize_zip(value) for value in [None, "SW1A", 99999]]
+        assert expected == result
+
+
+class TestReadCentroids:
+    def test_gazetteer_file(self, tmp_path):
+        path = tmp_path / "zip_centroids.txt"
+        path.write_text(
+            "GEOID\tALAND\tAWATER\tALAND_SQMI\tAWATER_SQMI\tINTPTLAT\tINTPTLONG                                                                                                               \n"
+            "02134\t1\t1\t1\t1\t42.356\t-71.130                   \n"
+            "51106\t1\t1\t1\t1\t42.467\t-96.350                   \n"
+        )
+        expected = ([2134, 51106], [42.356, 42.467], [-71.13, -96.35], [None, None])
+        result = read_centroids(str(path))
+        assert expected == result
+
+    def test_csv_file(self, tmp_path):
+        path = tmp_path / "zip_centroids.csv"
+        path.write_text("zip,state,lat,lng\n51106,ia,42.467,-96.350\nbad,IA,1,1\n")
+        expected = ([51106], [42.467], [-96.35], ["IA"])
+        result = read_centroids(str(path))
+        assert expected == result
+
+    def test_missing_file(self, tmp_path):
+        assert load_zip_index(str(tmp_path / "missing.txt")) is None
+
+    def test_bundled_file(self):
+        index = load_zip_index(BUNDLED)
+        assert len(index) == 33791
+        assert index.state("02134") == "MA"
+        assert index.location("51106") == pytest.approx((42.463, -96.313), abs=0.001)
+
+
+class TestZipIndex:
+    def test_zips_near(self, index):
+        expected = [51106, 51105, 51054]
+        result = index.zips_near("51106", 10)
+        assert expected == [zip_code for zip_code, _ in result]
+        assert result[0][1] == pytest.approx(0)
+        assert result[1][1] == pytest.approx(3.6, abs=0.1)
+
+    def test_radius_crosses_states(self, index):
+        expected = [51106, 51105, 51054, 68102]
+        result = [zip_code for zip_code, _ in index.zips_near("51106", 100)]
+        assert expected == result
+
+    def test_nearest(self, index):
+        expected = [51054, 51106]
+        result = [zip_code for zip_code, _ in index.nearest(42.3, -96.3, k=2)]
+        assert expected == result
+
+    def test_unknown_zip(self, index):
+        assert "90210" not in index
+        assert index.zips_near("90210", 10) == []
+        assert index.state("90210") is None
+
+    def test_contributions_near(self, index):
+        df = pd.DataFrame({
+            "contributor_zip": [68102, 51105, 99999, 51106, 2134],
+            "contribution_receipt_amount": [1, 2, 3, 4, 5],
+        })
+        expected = [(51106, 4), (51105, 2)]
+        result = index.contributions_near(df, "51106-1234", 10)
+        assert expected == list(result[["contributor_zip", "contribution_receipt_amount"]].itertuples(index=False, name=None))
+        assert "distance_miles" in result.columns